@@ -3,9 +3,13 @@ Streamlit Web Interface for RAG System Demo
 """
 
 import streamlit as st
-import pandas as pd
-import json
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import orjson
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from functools import lru_cache
+import os
 import sys
 
 # Add src to path
@@ -20,226 +24,170 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Custom CSS for better styling
-st.markdown("""
-<style>
-    /* Main title styling */
-    .main-title {
-        text-align: center;
-        background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-        -webkit-background-clip: text;
-        -webkit-text-fill-color: transparent;
-        font-size: 3rem;
-        font-weight: 800;
-        padding: 1rem 0;
-        margin-bottom: 0.5rem;
-    }
-
-    /* Subtitle styling */
-    .subtitle {
-        text-align: center;
-        color: #666;
-        font-size: 1.2rem;
-        margin-bottom: 2rem;
-    }
-
-    /* Feature cards */
-    .feature-card {
-        background: linear-gradient(135deg, #667eea15 0%, #764ba215 100%);
-        padding: 1.5rem;
-        border-radius: 12px;
-        border: 1px solid #667eea30;
-        margin: 1rem 0;
-        box-shadow: 0 4px 6px rgba(0,0,0,0.1);
-    }
-
-    /* Result cards */
-    .result-card {
-        background: white;
-        padding: 1.5rem;
-        border-radius: 10px;
-        border-left: 4px solid #667eea;
-        margin: 1rem 0;
-        box-shadow: 0 2px 8px rgba(0,0,0,0.1);
-    }
-
-    /* Product card styling */
-    .product-card {
-        background: linear-gradient(135deg, #f5f7fa 0%, #c3cfe2 100%);
-        padding: 1rem;
-        border-radius: 8px;
-        margin: 0.5rem 0;
-    }
-
-    /* FAQ card styling */
-    .faq-card {
-        background: linear-gradient(135deg, #ffecd2 0%, #fcb69f 100%);
-        padding: 1rem;
-        border-radius: 8px;
-        margin: 0.5rem 0;
-    }
-
-    /* Score badge */
-    .score-badge {
-        display: inline-block;
-        background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-        color: white;
-        padding: 0.3rem 0.8rem;
-        border-radius: 20px;
-        font-size: 0.9rem;
-        font-weight: 600;
-        margin: 0.5rem 0;
-    }
-
-    /* Stats box */
-    .stats-box {
-        background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-        color: white;
-        padding: 1rem;
-        border-radius: 10px;
-        text-align: center;
-        margin: 0.5rem 0;
-    }
-
-    /* Button styling */
-    .stButton>button {
-        background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-        color: white;
-        border: none;
-        border-radius: 8px;
-        padding: 0.5rem 1.5rem;
-        font-weight: 600;
-        transition: transform 0.2s;
-    }
-
-    .stButton>button:hover {
-        transform: translateY(-2px);
-        box-shadow: 0 4px 12px rgba(102,126,234,0.4);
-    }
-
-    /* Sidebar styling */
-    .css-1d391kg {
-        background: linear-gradient(180deg, #667eea15 0%, #764ba215 100%);
-    }
-
-    /* Search box styling */
-    .stTextInput>div>div>input {
-        border: 2px solid #667eea30;
-        border-radius: 10px;
-        padding: 0.75rem;
-        font-size: 1rem;
-    }
-
-    .stTextInput>div>div>input:focus {
-        border-color: #667eea;
-        box-shadow: 0 0 0 3px rgba(102,126,234,0.1);
-    }
-
-    /* Metric styling */
-    [data-testid="stMetricValue"] {
-        font-size: 2rem;
-        font-weight: 700;
-        color: #667eea;
-    }
-
-    /* Expander styling */
-    .streamlit-expanderHeader {
-        background: linear-gradient(135deg, #667eea15 0%, #764ba215 100%);
-        border-radius: 8px;
-        font-weight: 600;
-    }
-
-    /* Info box */
-    .info-box {
-        background: #e3f2fd;
-        border-left: 4px solid #2196f3;
-        padding: 1rem;
-        border-radius: 8px;
-        margin: 1rem 0;
-    }
-
-    /* Warning box */
-    .warning-box {
-        background: #fff3e0;
-        border-left: 4px solid #ff9800;
-        padding: 1rem;
-        border-radius: 8px;
-        margin: 1rem 0;
-    }
+@st.cache_data
+def load_css():
+    """Read the app stylesheet once; reruns reuse the cached string"""
+    return (Path(__file__).parent / "assets" / "styles.css").read_text()
 
-    /* Success box */
-    .success-box {
-        background: #e8f5e9;
-        border-left: 4px solid #4caf50;
-        padding: 1rem;
-        border-radius: 8px;
-        margin: 1rem 0;
-    }
-</style>
-""", unsafe_allow_html=True)
+# Custom CSS for better styling
+st.markdown(f"<style>{load_css()}</style>", unsafe_allow_html=True)
+
+# Queries behind the example buttons
+EXAMPLE_QUERIES = {
+    "💻 Gaming Laptops": "high performance gaming laptops",
+    "📱 Best Camera Phone": "phone with best camera quality",
+    "💰 Budget Options": "affordable devices under 500",
+    "❓ Return Policy": "return policy warranty",
+}
+
+# Data sources
+CSV_PATH = Path("data/raw/csvs/product_catalog.csv")
+PRICING_PATH = Path("data/raw/csvs/pricing.csv")
+FAQ_PATH = Path("data/raw/text/faqs.json")
+
+def data_fingerprint():
+    """Cheap cache key for the data sources (file modification times)"""
+    return tuple(
+        path.stat().st_mtime_ns if path.exists() else 0
+        for path in (CSV_PATH, PRICING_PATH, FAQ_PATH)
+    )
+
+def read_csv_records(path, column_types=None):
+    """
+    Read a CSV into a list of row dicts with pyarrow
+
+    Date-like columns are pinned to strings via column_types and missing
+    cells come back as NaN, so records match what pd.read_csv produced.
+    """
+    table = pacsv.read_csv(
+        path,
+        read_options=pacsv.ReadOptions(use_threads=True),
+        convert_options=pacsv.ConvertOptions(column_types=column_types or {}, strings_can_be_null=True)
+    )
+    nan = float('nan')
+    return [
+        {key: nan if value is None else value for key, value in row.items()}
+        for row in table.to_pylist()
+    ]
 
 @st.cache_data
-def load_data():
-    """Load all data sources"""
+def load_data(signature):
+    """
+    Load all data sources
+
+    Args:
+        signature: data_fingerprint() of the sources, so cached data is
+            shared across sessions but refreshed when a file changes
+    """
     data = {
         'products': [],
         'pricing': [],
+        'pricing_by_id': {},
         'faqs': []
     }
 
     # Load product catalog
-    csv_path = Path("data/raw/csvs/product_catalog.csv")
-    if csv_path.exists():
-        data['products'] = pd.read_csv(csv_path).to_dict('records')
+    if CSV_PATH.exists():
+        data['products'] = read_csv_records(CSV_PATH, {'release_date': pa.string()})
 
     # Load pricing
-    pricing_path = Path("data/raw/csvs/pricing.csv")
-    if pricing_path.exists():
-        data['pricing'] = pd.read_csv(pricing_path).to_dict('records')
+    if PRICING_PATH.exists():
+        data['pricing'] = read_csv_records(PRICING_PATH, {'valid_until': pa.string()})
+        data['pricing_by_id'] = {p['product_id']: p for p in data['pricing']}
 
     # Load FAQs
-    faq_path = Path("data/raw/text/faqs.json")
-    if faq_path.exists():
-        with open(faq_path, 'r') as f:
-            faq_data = json.load(f)
-            data['faqs'] = faq_data.get('faqs', [])
+    if FAQ_PATH.exists():
+        faq_data = orjson.loads(FAQ_PATH.read_bytes())
+        data['faqs'] = faq_data.get('faqs', [])
+
+    # Pre-render result cards once per cache miss instead of on every rerun
+    for product in data['products']:
+        product['_card_html'] = product_card_html(product, data['pricing_by_id'].get(product['product_id']))
+    for faq in data['faqs']:
+        faq['_card_html'] = faq_card_html(faq)
 
     return data
 
 @st.cache_resource
-def build_search_index(data):
-    """Build hybrid search index with ChromaDB + BM25"""
-    # Combine all searchable text
+def build_search_index(fingerprint):
+    """
+    Build hybrid search index with ChromaDB + BM25
+
+    Keyed on the data fingerprint so Streamlit only hashes a tuple of ints
+    on each rerun instead of the whole data dict.
+    """
+    data = load_data(fingerprint)
+
+    # Combine all searchable text; document types and payloads are kept as
+    # parallel lists indexed by document id
     documents = []
-    doc_metadata = []
+    doc_types = []
+    payloads = []
 
     # Add products
     for product in data['products']:
-        text = f"{product['model']} {product['category']} {product['brand']} "
-        text += f"{product.get('processor', '')} {product.get('ram_gb', '')}GB RAM "
-        text += f"{product.get('storage_gb', '')}GB storage ${product.get('price_usd', '')}"
-        documents.append(text)
-        doc_metadata.append({'type': 'product', 'data': product})
+        documents.append(
+            f"{product['model']} {product['category']} {product['brand']} "
+            f"{product.get('processor', '')} {product.get('ram_gb', '')}GB RAM "
+            f"{product.get('storage_gb', '')}GB storage ${product.get('price_usd', '')}"
+        )
+        doc_types.append('product')
+        payloads.append(product)
 
     # Add FAQs
     for faq in data['faqs']:
-        text = f"{faq['question']} {faq['answer']}"
-        documents.append(text)
-        doc_metadata.append({'type': 'faq', 'data': faq})
+        documents.append(f"{faq['question']} {faq['answer']}")
+        doc_types.append('faq')
+        payloads.append(faq)
 
     # Build hybrid index with ChromaDB vector store + BM25
-    hybrid_store = HybridVectorStore(collection_name="rag_products", persist_directory="./chroma_db")
+    # (vectors are only re-embedded when the persisted collection is out of date)
+    hybrid_store = HybridVectorStore(
+        collection_name="rag_products",
+        persist_directory=os.environ.get("CHROMA_DIR", "./chroma_db")
+    )
+    hybrid_store.build_index(documents, [{'type': doc_type} for doc_type in doc_types])
+
+    # Precompute the example-button queries at the default weight so the
+    # common entry paths are a dict lookup
+    alpha_buckets = {round(hybrid_store.default_alpha * 10)}
+    hybrid_store.example_results = {
+        (query, 5, bucket): hybrid_store.hybrid_search(query, top_k=5, alpha=bucket / 10)
+        for query in EXAMPLE_QUERIES.values()
+        for bucket in alpha_buckets
+    }
 
-    # Check if index already exists
-    if hybrid_store.get_stats()['vector_count'] == 0:
-        # Build new index
-        hybrid_store.build_index(documents, doc_metadata)
+    return hybrid_store, doc_types, payloads
 
-    return hybrid_store
+@st.cache_resource
+def get_search_executor():
+    """Thread pool shared by all sessions for running searches in the background"""
+    return ThreadPoolExecutor(max_workers=4)
 
-def search(query, hybrid_store, top_k=5, alpha=0.7):
-    """Search using hybrid ChromaDB + BM25"""
-    return hybrid_store.hybrid_search(query, top_k=top_k, alpha=alpha)
+@st.cache_resource
+def get_cached_search(fingerprint):
+    """
+    Memoized hybrid search over the index built for this data fingerprint
+
+    A plain lru_cache (thread-safe, so the search executor can call it), shared
+    by all sessions and rebuilt together with the index. Arguments are
+    (query, top_k, alpha_bucket), with alpha_bucket being alpha in tenths.
+    """
+    hybrid_store = build_search_index(fingerprint)[0]
+
+    @lru_cache(maxsize=256)
+    def cached_search(query, top_k, alpha_bucket):
+        return hybrid_store.hybrid_search(query, top_k=top_k, alpha=alpha_bucket / 10)
+
+    return cached_search
+
+def search(query, hybrid_store, cached_search, top_k=5, alpha=0.7):
+    """Search using hybrid ChromaDB + BM25 (memoized per query, top_k and slider step)"""
+    key = (query, top_k, round(alpha * 10))
+    precomputed = getattr(hybrid_store, 'example_results', {})
+    if key in precomputed:
+        return precomputed[key]
+    return cached_search(*key)
 
 def format_product(product):
     """Format product for display"""
@@ -254,6 +202,45 @@ def format_product(product):
 - **In Stock**: {'✅ Yes' if product.get('in_stock') else '❌ No'}
 """
 
+def product_card_html(product, pricing=None):
+    """Render a product result (card, price box, stock status, offer) as one HTML block"""
+    if product.get('in_stock'):
+        stock = '<div class="stock-badge in-stock">✅ In Stock</div>'
+    else:
+        stock = '<div class="stock-badge out-of-stock">❌ Out of Stock</div>'
+
+    offer = ''
+    if pricing and pricing['discount_percent'] > 0:
+        offer = (
+            '<div class="success-box"><strong>🎉 SPECIAL OFFER!</strong><br/>'
+            f"Save {pricing['discount_percent']}% - "
+            f"Sale Price: <strong>${pricing['sale_price_usd']:.2f}</strong></div>"
+        )
+
+    return (
+        '<div class="product-card"><div class="card-grid"><div>'
+        f"<h3>{product['model']}</h3>"
+        f"<p><strong>Brand:</strong> {product.get('brand', 'N/A')} | <strong>Category:</strong> {product['category']}</p>"
+        '<hr/><div class="spec-grid">'
+        f"<p><strong>🔧 Processor:</strong> {product.get('processor', 'N/A')}<br/>"
+        f"<strong>💾 RAM:</strong> {product.get('ram_gb', 'N/A')} GB</p>"
+        f"<p><strong>💽 Storage:</strong> {product.get('storage_gb', 'N/A')} GB<br/>"
+        f"<strong>⭐ Rating:</strong> {product.get('rating', 'N/A')}/5.0</p>"
+        '</div></div><div>'
+        '<div class="price-box">'
+        f"<h2 style=\"margin:0; color:white;\">${product.get('price_usd', 'N/A')}</h2>"
+        '<p style="margin:0; color:white;">Current Price</p></div>'
+        f"{stock}</div></div></div>{offer}"
+    )
+
+def faq_card_html(faq):
+    """Render an FAQ result as one HTML block"""
+    return (
+        '<div class="faq-card">'
+        f"<h3>❓ {faq['question']}</h3><hr/>"
+        f"<p><strong>Answer:</strong> {faq['answer']}</p></div>"
+    )
+
 # Main app header
 st.markdown('<h1 class="main-title">🤖 Advanced RAG System</h1>', unsafe_allow_html=True)
 st.markdown('<p class="subtitle">Intelligent Sales & Product Knowledge Assistant</p>', unsafe_allow_html=True)
@@ -302,8 +289,9 @@ st.markdown("""
 
 # Load data
 with st.spinner("Loading product catalog and building search index..."):
-    data = load_data()
-    hybrid_store = build_search_index(data)
+    fingerprint = data_fingerprint()
+    data = load_data(fingerprint)
+    hybrid_store, doc_types, payloads = build_search_index(fingerprint)
 
 # Sidebar stats
 st.sidebar.title("📊 Data Statistics")
@@ -321,14 +309,21 @@ st.sidebar.caption("🤖 Using ChromaDB + BM25 Hybrid Search")
 # Search settings
 st.sidebar.divider()
 st.sidebar.subheader("⚙️ Search Settings")
-alpha = st.sidebar.slider(
-    "Semantic Weight",
-    min_value=0.0,
-    max_value=1.0,
-    value=0.7,
-    step=0.1,
-    help="Balance between semantic (ChromaDB) and keyword (BM25) search. Higher = more semantic."
-)
+if 'alpha' not in st.session_state:
+    st.session_state.alpha = hybrid_store.default_alpha
+
+# The slider lives in a form so dragging it doesn't rerun the search until applied
+with st.sidebar.form("search_settings"):
+    st.slider(
+        "Semantic Weight",
+        min_value=0.0,
+        max_value=1.0,
+        step=0.1,
+        key="alpha",
+        help="Balance between semantic (ChromaDB) and keyword (BM25) search. Higher = more semantic."
+    )
+    st.form_submit_button("Apply", use_container_width=True)
+alpha = st.session_state.alpha
 
 # Query input section
 st.markdown("<br>", unsafe_allow_html=True)
@@ -337,122 +332,73 @@ st.markdown("## 💬 Ask Your Question")
 query = st.text_input(
     "Search for products, pricing, or information:",
     placeholder="e.g., 'Which laptops have 16GB RAM?' or 'What is the return policy?'",
-    label_visibility="collapsed"
+    label_visibility="collapsed",
+    key="query"
 )
 
-# Example queries with better styling
+# Example queries with better styling. Buttons fill the search box through a
+# callback, which runs before the text input is created on the next rerun.
+def use_example(example_query):
+    st.session_state.query = example_query
+
 st.markdown("**✨ Try these examples:**")
-col1, col2, col3, col4 = st.columns(4)
-with col1:
-    if st.button("💻 Gaming Laptops", use_container_width=True):
-        query = "high performance gaming laptops"
-with col2:
-    if st.button("📱 Best Camera Phone", use_container_width=True):
-        query = "phone with best camera quality"
-with col3:
-    if st.button("💰 Budget Options", use_container_width=True):
-        query = "affordable devices under 500"
-with col4:
-    if st.button("❓ Return Policy", use_container_width=True):
-        query = "return policy warranty"
+for col, (label, example_query) in zip(st.columns(len(EXAMPLE_QUERIES)), EXAMPLE_QUERIES.items()):
+    with col:
+        st.button(label, use_container_width=True, on_click=use_example, args=(example_query,))
 
 if query:
     st.markdown("---")
     st.markdown(f"## 🔍 Results for: <span style='color:#667eea;'>*{query}*</span>", unsafe_allow_html=True)
     st.markdown("<br>", unsafe_allow_html=True)
 
-    # Search with hybrid approach
-    with st.spinner("🔎 Searching..."):
-        results = search(query, hybrid_store, top_k=5, alpha=alpha)
+    # Search with hybrid approach in the background. The key includes the
+    # index fingerprint so a rebuilt index never shows the old index's results.
+    search_key = (fingerprint, query, alpha)
+    if st.session_state.get('search_key') != search_key:
+        st.session_state.search_key = search_key
+        st.session_state.search_future = get_search_executor().submit(
+            search, query, hybrid_store, get_cached_search(fingerprint), 5, alpha
+        )
+
+    # Wait in short slices: each placeholder update gives Streamlit a chance
+    # to interrupt the wait when the user changes the query
+    future = st.session_state.search_future
+    status = st.empty()
+    while True:
+        try:
+            results = future.result(timeout=0.1)
+            break
+        except FutureTimeoutError:
+            status.markdown('<div class="info-box">🔎 Searching...</div>', unsafe_allow_html=True)
+        except Exception:
+            # Forget the failed search so the next rerun retries it
+            del st.session_state.search_key
+            raise
+    status.empty()
 
     if results:
         st.markdown(f'<div class="info-box">📊 Found <strong>{len(results)}</strong> relevant results (semantic weight: {alpha*100:.0f}%)</div>', unsafe_allow_html=True)
 
         for i, result in enumerate(results, 1):
-            metadata_item = result['metadata']
+            doc_type = doc_types[result['id']]
+            payload = payloads[result['id']]
 
-            # Determine card type and color
-            if metadata_item['type'] == 'product':
+            # Determine card type
+            if doc_type == 'product':
                 card_icon = "💻"
                 card_type = "Product"
-                card_color = "#667eea"
             else:
                 card_icon = "❓"
                 card_type = "FAQ"
-                card_color = "#ff9800"
 
+            # One markdown element per result instead of a widget per field
             with st.expander(f"{card_icon} **Result #{i}** - {card_type} | Relevance: {result['score']:.2%}", expanded=(i==1)):
-                # Score badge
-                st.markdown(f'<span class="score-badge">🎯 Relevance Score: {result["score"]:.3f}</span>', unsafe_allow_html=True)
-
-                if metadata_item['type'] == 'product':
-                    product = metadata_item['data']
-
-                    # Product card with better styling
-                    st.markdown('<div class="product-card">', unsafe_allow_html=True)
-
-                    col_a, col_b = st.columns([2, 1])
-
-                    with col_a:
-                        st.markdown(f"### {product['model']}")
-                        st.markdown(f"**Brand:** {product.get('brand', 'N/A')} | **Category:** {product['category']}")
-                        st.markdown("---")
-
-                        # Specs in columns
-                        spec_col1, spec_col2 = st.columns(2)
-                        with spec_col1:
-                            st.markdown(f"**🔧 Processor:** {product.get('processor', 'N/A')}")
-                            st.markdown(f"**💾 RAM:** {product.get('ram_gb', 'N/A')} GB")
-                        with spec_col2:
-                            st.markdown(f"**💽 Storage:** {product.get('storage_gb', 'N/A')} GB")
-                            st.markdown(f"**⭐ Rating:** {product.get('rating', 'N/A')}/5.0")
-
-                    with col_b:
-                        # Price box
-                        price = product.get('price_usd', 'N/A')
-                        st.markdown(f"""
-                        <div style="background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-                                    padding: 1.5rem; border-radius: 10px; text-align: center; color: white;">
-                            <h2 style="margin:0; color:white;">${price}</h2>
-                            <p style="margin:0; color:white;">Current Price</p>
-                        </div>
-                        """, unsafe_allow_html=True)
-
-                        # Stock status
-                        if product.get('in_stock'):
-                            st.success("✅ In Stock")
-                        else:
-                            st.error("❌ Out of Stock")
-
-                    st.markdown('</div>', unsafe_allow_html=True)
-
-                    # Show pricing if available
-                    pricing_match = next(
-                        (p for p in data['pricing'] if p['product_id'] == product['product_id']),
-                        None
-                    )
-                    if pricing_match and pricing_match['discount_percent'] > 0:
-                        st.markdown(f"""
-                        <div class="success-box">
-                            <strong>🎉 SPECIAL OFFER!</strong><br/>
-                            Save {pricing_match['discount_percent']}% -
-                            Sale Price: <strong>${pricing_match['sale_price_usd']:.2f}</strong>
-                        </div>
-                        """, unsafe_allow_html=True)
-
-                elif metadata_item['type'] == 'faq':
-                    faq = metadata_item['data']
-
-                    # FAQ card with better styling
-                    st.markdown('<div class="faq-card">', unsafe_allow_html=True)
-                    st.markdown(f"### ❓ {faq['question']}")
-                    st.markdown("---")
-                    st.markdown(f"**Answer:** {faq['answer']}")
-                    st.markdown('</div>', unsafe_allow_html=True)
-
-                # Citation
-                st.markdown("---")
-                st.caption(f"📄 **Source Type:** {metadata_item['type'].upper()}")
+                st.markdown(
+                    f'<span class="score-badge">🎯 Relevance Score: {result["score"]:.3f}</span>'
+                    f'{payload["_card_html"]}<hr/>'
+                    f'<p class="source-caption">📄 <strong>Source Type:</strong> {doc_type.upper()}</p>',
+                    unsafe_allow_html=True
+                )
 
     else:
         st.markdown("""
@@ -462,11 +408,18 @@ if query:
         </div>
         """, unsafe_allow_html=True)
 
-# Data viewer
-with st.expander("📁 Browse All Products"):
-    if data['products']:
-        df = pd.DataFrame(data['products'])
-        st.dataframe(df, use_container_width=True)
+# Data viewer (built only while toggled on, one page at a time)
+PRODUCTS_PAGE_SIZE = 50
+if data['products'] and st.toggle("📁 Browse All Products"):
+    num_products = len(data['products'])
+    num_pages = -(-num_products // PRODUCTS_PAGE_SIZE)
+    page = st.number_input("Page", min_value=1, max_value=num_pages, value=1, step=1) - 1
+    start = page * PRODUCTS_PAGE_SIZE
+    end = min(start + PRODUCTS_PAGE_SIZE, num_products)
+    import pandas as pd  # Only needed while the browser is open
+    df = pd.DataFrame(data['products'][start:end]).drop(columns='_card_html')
+    st.dataframe(df, use_container_width=True)
+    st.caption(f"Showing products {start + 1}-{end} of {num_products}")
 
 # Footer
 st.markdown("---")
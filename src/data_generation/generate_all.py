@@ -3,6 +3,7 @@ Master script to generate all synthetic data
 """
 
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 # Add src to path
@@ -21,8 +22,12 @@ def main():
     print("\n[1/3] Generating product catalog...")
     product_gen = ProductDataGenerator()
     products = product_gen.generate_catalog(num_products=150)
-    product_gen.save_as_csv(products)
-    product_gen.save_as_json(products)
+    # Both writes are I/O-bound, so run them side by side
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        saves = [executor.submit(product_gen.save_as_csv, products),
+                 executor.submit(product_gen.save_as_json, products)]
+        for save in saves:
+            save.result()
 
     # Step 2: Generate pricing and FAQs
     print("\n[2/3] Generating pricing and FAQ data...")
@@ -3,16 +3,166 @@ PDF Product Manual Generator
 Creates realistic product manuals in PDF format
 """
 
+from reportlab import Version as REPORTLAB_VERSION
 from reportlab.lib.pagesizes import letter
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
 from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, PageBreak
 from reportlab.lib import colors
 from reportlab.lib.enums import TA_CENTER, TA_JUSTIFY
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from io import BytesIO
 from pathlib import Path
+import copy
+import hashlib
 import json
 import random
 
+# Boilerplate sections that are identical in every manual
+LAPTOP_SETUP_TEXT = """
+<b>1. Unboxing:</b> Carefully remove your laptop from the packaging. Ensure all accessories are present.<br/><br/>
+<b>2. Charging:</b> Connect the power adapter and charge the battery fully before first use (approximately 2-3 hours).<br/><br/>
+<b>3. Power On:</b> Press the power button located on the keyboard. The system will boot up automatically.<br/><br/>
+<b>4. Initial Setup:</b> Follow the on-screen instructions to configure language, region, and user account.<br/><br/>
+<b>5. Updates:</b> Connect to Wi-Fi and install any available system updates for optimal performance.
+"""
+
+LAPTOP_CARE_TEXT = """
+<b>Cleaning:</b> Use a soft, lint-free cloth to clean the screen and body. Avoid harsh chemicals.<br/><br/>
+<b>Ventilation:</b> Ensure air vents are not blocked. Use on hard, flat surfaces for optimal cooling.<br/><br/>
+<b>Battery Care:</b> Avoid complete discharge. Keep battery level between 20-80% for longevity.<br/><br/>
+<b>Software Updates:</b> Regularly update your operating system and applications for security and performance.<br/><br/>
+<b>Backup:</b> Regularly backup important data to external storage or cloud services.
+"""
+
+PHONE_GETTING_STARTED_TEXT = """
+<b>1. Insert SIM Card:</b> Use the SIM ejector tool to open the SIM tray. Insert your nano-SIM card.<br/><br/>
+<b>2. Power On:</b> Hold the power button for 3 seconds until the screen lights up.<br/><br/>
+<b>3. Setup Wizard:</b> Follow on-screen prompts to select language, connect to Wi-Fi, and sign in.<br/><br/>
+<b>4. Security Setup:</b> Configure face unlock, fingerprint, or PIN for device security.<br/><br/>
+<b>5. App Installation:</b> Download essential apps from the app store.
+"""
+
+# Manuals are stamped with a digest of their inputs: the product record, this
+# module's source and the ReportLab version. A manual already on disk with the
+# same stamp is left as is instead of being re-rendered.
+_TEMPLATE_DIGEST = hashlib.sha256(Path(__file__).read_bytes() + REPORTLAB_VERSION.encode()).hexdigest()
+
+def _content_stamp(product):
+    """Digest identifying the rendered output for this product"""
+    record = json.dumps(product, sort_keys=True, default=str).encode()
+    return "manual-stamp:" + hashlib.sha256(_TEMPLATE_DIGEST.encode() + record).hexdigest()
+
+def _is_current(filepath, stamp):
+    """True if filepath is a manual rendered with this stamp (kept in the PDF's /Keywords)"""
+    try:
+        return f"/Keywords ({stamp})".encode() in Path(filepath).read_bytes()
+    except OSError:
+        return False
+
+# Spec table label columns; each manual zips its values against these
+LAPTOP_SPEC_HEADER = ('Specification', 'Details')
+LAPTOP_SPEC_LABELS = ('Processor', 'Memory (RAM)', 'Storage', 'Display', 'Graphics',
+                      'Battery Life', 'Operating System', 'Weight', 'Warranty')
+PHONE_SPEC_HEADER = ('Feature', 'Specification')
+PHONE_SPEC_LABELS = ('Processor', 'RAM', 'Storage', 'Display', 'Camera',
+                     'Battery', '5G Support', 'OS')
+
+LAPTOP_TROUBLESHOOTING_ROWS = (
+    ('Issue', 'Solution'),
+    ('Device won\'t power on', 'Ensure battery is charged. Try holding power button for 10 seconds.'),
+    ('Screen is dim', 'Adjust brightness using Fn + brightness keys.'),
+    ('Wi-Fi not connecting', 'Toggle airplane mode on/off. Restart router if needed.'),
+    ('Device running slow', 'Close unused applications. Check for malware. Free up storage space.'),
+    ('Battery draining quickly', 'Reduce screen brightness. Close background apps. Check battery health in settings.')
+)
+
+LAPTOP_WARRANTY_TEXT = """
+This product includes a {years}-year limited warranty covering manufacturing defects.
+The warranty does not cover physical damage, liquid damage, or damage from unauthorized repairs.
+For warranty service, please contact customer support with your proof of purchase and product serial number.
+<br/><br/>
+<b>Customer Support:</b> support@techstore.com | 1-800-TECH-HELP
+<br/>
+<b>Website:</b> www.techstore.com/support
+"""
+
+# Size of the pool of parsed paragraphs. Spec-driven text such as the laptop
+# feature bullets only takes a few hundred distinct values across a catalog.
+PARAGRAPH_POOL_SIZE = 1024
+
+@lru_cache(maxsize=PARAGRAPH_POOL_SIZE)
+def _cached_paragraph(text, style):
+    """Parsed Paragraph pooled on (text, style); style must be a shared stylesheet entry (hashed by identity)"""
+    return Paragraph(text, style)
+
+def _shared_paragraph(text, style):
+    """Paragraph for text that repeats across manuals: parsed once per process, copied per story"""
+    return copy.copy(_cached_paragraph(text, style))
+
+# Spacers hold no per-document layout state, so the same instances are reused everywhere
+SMALL_GAP = Spacer(1, 0.1*inch)
+MEDIUM_GAP = Spacer(1, 0.2*inch)
+SECTION_GAP = Spacer(1, 0.3*inch)
+
+# Table styles hold no per-document state, so one instance of each is shared by every manual
+LAPTOP_SPEC_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#2c5aa0')),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, 0), 12),
+    ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+    ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+    ('GRID', (0, 0), (-1, -1), 1, colors.black)
+])
+PHONE_SPEC_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#2c5aa0')),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, 0), 12),
+    ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+    ('GRID', (0, 0), (-1, -1), 1, colors.black)
+])
+TROUBLE_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#2c5aa0')),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, -1), 10),
+    ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+    ('BACKGROUND', (0, 1), (-1, -1), colors.lightgrey),
+    ('GRID', (0, 0), (-1, -1), 1, colors.black),
+    ('VALIGN', (0, 0), (-1, -1), 'TOP')
+])
+
+# Below this many products the manuals are rendered in-process: starting a
+# pool costs more than it saves
+MIN_PARALLEL_MANUALS = 16
+
+# Set in each worker process by _init_worker, so the stylesheet setup is paid
+# once per process rather than once per manual
+_worker_generator = None
+
+def _init_worker(output_dir):
+    """Create the generator used by this worker process"""
+    global _worker_generator
+    _worker_generator = PDFManualGenerator(output_dir)
+
+def _safe_generate(generator, product):
+    """Render one manual, reporting and skipping products whose manual fails"""
+    try:
+        return generator.generate_manual(product)
+    except Exception as e:
+        print(f"Error generating manual for {product.get('model', 'unknown')}: {e}")
+        return None
+
+def _render_one(product):
+    """Render one manual in a worker process"""
+    return _safe_generate(_worker_generator, product)
+
 class PDFManualGenerator:
     """Generate product manuals as PDFs"""
 
@@ -21,6 +171,14 @@ class PDFManualGenerator:
         self.output_dir.mkdir(parents=True, exist_ok=True)
         self.styles = getSampleStyleSheet()
         self._setup_custom_styles()
+        self._build_templates()
+
+        # Category -> manual builder (tablets can use phone manual template)
+        self._manual_builders = {
+            'Laptop': self.generate_laptop_manual,
+            'Smartphone': self.generate_phone_manual,
+            'Tablet': self.generate_phone_manual
+        }
 
     def _setup_custom_styles(self):
         """Create custom text styles"""
@@ -42,251 +200,232 @@ class PDFManualGenerator:
             spaceBefore=12
         ))
 
+    def _build_templates(self):
+        """Precompile the runs of flowables that are identical in every manual
+
+        Each manual takes shallow copies of these (a flowable keeps layout
+        state from the document it was drawn in), so their markup is parsed
+        and their tables assembled once per generator instead of per product.
+        """
+        section_title = self.styles['SectionTitle']
+        body_style = self.styles['BodyText']
+
+        troubleshoot_table = Table(LAPTOP_TROUBLESHOOTING_ROWS, colWidths=[2*inch, 4*inch])
+        troubleshoot_table.setStyle(TROUBLE_TABLE_STYLE)
+
+        # Setup guide through the warranty heading (the warranty body names the product's term)
+        self._laptop_support_template = (
+            Paragraph("Quick Setup Guide", section_title),
+            Paragraph(LAPTOP_SETUP_TEXT, body_style),
+            SECTION_GAP,
+            Paragraph("Care and Maintenance", section_title),
+            Paragraph(LAPTOP_CARE_TEXT, body_style),
+            SECTION_GAP,
+            Paragraph("Troubleshooting", section_title),
+            troubleshoot_table,
+            SECTION_GAP,
+            Paragraph("Warranty Information", section_title)
+        )
+
+        self._phone_getting_started_template = (
+            Paragraph("Getting Started", section_title),
+            Paragraph(PHONE_GETTING_STARTED_TEXT, body_style),
+            SECTION_GAP
+        )
+
     def generate_laptop_manual(self, product):
         """Generate laptop product manual"""
+        # Look up every field once; processor is kept raw since the narrative uses its own default
+        model = product['model']
+        processor = product.get('processor')
+        ram = product.get('ram_gb', 'N/A')
+        storage = product.get('storage_gb', 'N/A')
+        screen_size = product.get('screen_size_inches', 'N/A')
+        resolution = product.get('screen_resolution', 'N/A')
+        graphics = product.get('graphics', 'N/A')
+        battery_hours = product.get('battery_hours', 'N/A')
+        operating_system = product.get('operating_system', 'N/A')
+        weight = product.get('weight_kg', 'N/A')
+        warranty_years = product.get('warranty_years', 'N/A')
+
         filename = f"{product['product_id']}_manual.pdf"
         filepath = self.output_dir / filename
+        stamp = _content_stamp(product)
+        if _is_current(filepath, stamp):
+            return filepath
 
-        doc = SimpleDocTemplate(str(filepath), pagesize=letter,
+        buffer = BytesIO()
+        doc = SimpleDocTemplate(buffer, pagesize=letter,
                               rightMargin=72, leftMargin=72,
-                              topMargin=72, bottomMargin=18)
-
-        story = []
+                              topMargin=72, bottomMargin=18,
+                              keywords=stamp)
 
-        # Title
-        title = Paragraph(f"{product['model']}<br/>User Manual", self.styles['CustomTitle'])
-        story.append(title)
-        story.append(Spacer(1, 0.3*inch))
+        section_title = self.styles['SectionTitle']
+        body_style = self.styles['BodyText']
 
-        # Product Overview
-        story.append(Paragraph("Product Overview", self.styles['SectionTitle']))
         overview_text = f"""
-        Thank you for purchasing the {product['model']}. This premium laptop combines
+        Thank you for purchasing the {model}. This premium laptop combines
         cutting-edge technology with sleek design to deliver exceptional performance for
         your daily computing needs. Whether you're working, creating, or entertaining,
         this device offers the power and versatility you need.
         """
-        story.append(Paragraph(overview_text, self.styles['BodyText']))
-        story.append(Spacer(1, 0.2*inch))
-
-        # Technical Specifications
-        story.append(Paragraph("Technical Specifications", self.styles['SectionTitle']))
-
-        spec_data = [
-            ['Specification', 'Details'],
-            ['Processor', product.get('processor', 'N/A')],
-            ['Memory (RAM)', f"{product.get('ram_gb', 'N/A')} GB"],
-            ['Storage', f"{product.get('storage_gb', 'N/A')} GB SSD"],
-            ['Display', f"{product.get('screen_size_inches', 'N/A')}\" {product.get('screen_resolution', 'N/A')}"],
-            ['Graphics', product.get('graphics', 'N/A')],
-            ['Battery Life', f"Up to {product.get('battery_hours', 'N/A')} hours"],
-            ['Operating System', product.get('operating_system', 'N/A')],
-            ['Weight', f"{product.get('weight_kg', 'N/A')} kg"],
-            ['Warranty', f"{product.get('warranty_years', 'N/A')} years"]
-        ]
 
+        spec_values = (
+            processor or 'N/A',
+            f"{ram} GB",
+            f"{storage} GB SSD",
+            f"{screen_size}\" {resolution}",
+            graphics,
+            f"Up to {battery_hours} hours",
+            operating_system,
+            f"{weight} kg",
+            f"{warranty_years} years"
+        )
+        spec_data = [LAPTOP_SPEC_HEADER, *zip(LAPTOP_SPEC_LABELS, spec_values)]
         spec_table = Table(spec_data, colWidths=[2.5*inch, 3.5*inch])
-        spec_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#2c5aa0')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 12),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black)
-        ]))
-        story.append(spec_table)
-        story.append(Spacer(1, 0.3*inch))
+        spec_table.setStyle(LAPTOP_SPEC_TABLE_STYLE)
 
-        # Key Features
-        story.append(Paragraph("Key Features", self.styles['SectionTitle']))
         features = [
-            f"<b>High-Performance Processing:</b> Powered by {product.get('processor', 'advanced processor')} for seamless multitasking",
-            f"<b>Ample Memory:</b> {product.get('ram_gb', 'N/A')} GB RAM ensures smooth operation of multiple applications",
-            f"<b>Fast Storage:</b> {product.get('storage_gb', 'N/A')} GB SSD provides quick boot times and file access",
-            f"<b>Stunning Display:</b> {product.get('screen_size_inches', 'N/A')}-inch screen with vibrant colors and sharp details",
-            f"<b>All-Day Battery:</b> Up to {product.get('battery_hours', 'N/A')} hours of battery life",
-            f"<b>Premium Build:</b> Sleek design weighing only {product.get('weight_kg', 'N/A')} kg"
+            f"<b>High-Performance Processing:</b> Powered by {processor or 'advanced processor'} for seamless multitasking",
+            f"<b>Ample Memory:</b> {ram} GB RAM ensures smooth operation of multiple applications",
+            f"<b>Fast Storage:</b> {storage} GB SSD provides quick boot times and file access",
+            f"<b>Stunning Display:</b> {screen_size}-inch screen with vibrant colors and sharp details",
+            f"<b>All-Day Battery:</b> Up to {battery_hours} hours of battery life",
+            f"<b>Premium Build:</b> Sleek design weighing only {weight} kg"
         ]
 
+        # Assemble the story a section at a time
+        story = [
+            # Title
+            Paragraph(f"{model}<br/>User Manual", self.styles['CustomTitle']),
+            SECTION_GAP,
+            # Product Overview
+            _shared_paragraph("Product Overview", section_title),
+            Paragraph(overview_text, body_style),
+            MEDIUM_GAP,
+            # Technical Specifications
+            _shared_paragraph("Technical Specifications", section_title),
+            spec_table,
+            SECTION_GAP,
+            # Key Features
+            _shared_paragraph("Key Features", section_title)
+        ]
         for feature in features:
-            story.append(Paragraph(f"• {feature}", self.styles['BodyText']))
-            story.append(Spacer(1, 0.1*inch))
-
+            story.extend((_shared_paragraph(f"• {feature}", body_style), SMALL_GAP))
         story.append(PageBreak())
 
-        # Setup Guide
-        story.append(Paragraph("Quick Setup Guide", self.styles['SectionTitle']))
-        setup_text = """
-        <b>1. Unboxing:</b> Carefully remove your laptop from the packaging. Ensure all accessories are present.<br/><br/>
-        <b>2. Charging:</b> Connect the power adapter and charge the battery fully before first use (approximately 2-3 hours).<br/><br/>
-        <b>3. Power On:</b> Press the power button located on the keyboard. The system will boot up automatically.<br/><br/>
-        <b>4. Initial Setup:</b> Follow the on-screen instructions to configure language, region, and user account.<br/><br/>
-        <b>5. Updates:</b> Connect to Wi-Fi and install any available system updates for optimal performance.
-        """
-        story.append(Paragraph(setup_text, self.styles['BodyText']))
-        story.append(Spacer(1, 0.3*inch))
-
-        # Care and Maintenance
-        story.append(Paragraph("Care and Maintenance", self.styles['SectionTitle']))
-        care_text = """
-        <b>Cleaning:</b> Use a soft, lint-free cloth to clean the screen and body. Avoid harsh chemicals.<br/><br/>
-        <b>Ventilation:</b> Ensure air vents are not blocked. Use on hard, flat surfaces for optimal cooling.<br/><br/>
-        <b>Battery Care:</b> Avoid complete discharge. Keep battery level between 20-80% for longevity.<br/><br/>
-        <b>Software Updates:</b> Regularly update your operating system and applications for security and performance.<br/><br/>
-        <b>Backup:</b> Regularly backup important data to external storage or cloud services.
-        """
-        story.append(Paragraph(care_text, self.styles['BodyText']))
-        story.append(Spacer(1, 0.3*inch))
-
-        # Troubleshooting
-        story.append(Paragraph("Troubleshooting", self.styles['SectionTitle']))
-        troubleshoot_data = [
-            ['Issue', 'Solution'],
-            ['Device won\'t power on', 'Ensure battery is charged. Try holding power button for 10 seconds.'],
-            ['Screen is dim', 'Adjust brightness using Fn + brightness keys.'],
-            ['Wi-Fi not connecting', 'Toggle airplane mode on/off. Restart router if needed.'],
-            ['Device running slow', 'Close unused applications. Check for malware. Free up storage space.'],
-            ['Battery draining quickly', 'Reduce screen brightness. Close background apps. Check battery health in settings.']
-        ]
-
-        troubleshoot_table = Table(troubleshoot_data, colWidths=[2*inch, 4*inch])
-        troubleshoot_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#2c5aa0')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 10),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.lightgrey),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black),
-            ('VALIGN', (0, 0), (-1, -1), 'TOP')
-        ]))
-        story.append(troubleshoot_table)
-        story.append(Spacer(1, 0.3*inch))
-
-        # Warranty Information
-        story.append(Paragraph("Warranty Information", self.styles['SectionTitle']))
-        warranty_text = f"""
-        This product includes a {product.get('warranty_years', 'N/A')}-year limited warranty covering manufacturing defects.
-        The warranty does not cover physical damage, liquid damage, or damage from unauthorized repairs.
-        For warranty service, please contact customer support with your proof of purchase and product serial number.
-        <br/><br/>
-        <b>Customer Support:</b> support@techstore.com | 1-800-TECH-HELP
-        <br/>
-        <b>Website:</b> www.techstore.com/support
-        """
-        story.append(Paragraph(warranty_text, self.styles['BodyText']))
+        # Setup guide, care, troubleshooting and warranty heading, then the
+        # warranty body (only a handful of terms exist, so it is parsed once per term)
+        story.extend(copy.copy(flowable) for flowable in self._laptop_support_template)
+        story.append(_shared_paragraph(LAPTOP_WARRANTY_TEXT.format(years=warranty_years), body_style))
 
         # Build PDF
         doc.build(story)
+        filepath.write_bytes(buffer.getbuffer())
         return filepath
 
     def generate_phone_manual(self, product):
         """Generate smartphone product manual"""
+        # Look up every field once; fields whose narrative default differs from 'N/A' are kept raw
+        model = product['model']
+        processor = product.get('processor')
+        camera = product.get('camera_mp')
+        battery_mah = product.get('battery_mah')
+        screen_size = product.get('screen_size_inches')
+        ram = product.get('ram_gb', 'N/A')
+        storage = product.get('storage_gb', 'N/A')
+        resolution = product.get('screen_resolution', 'N/A')
+        operating_system = product.get('operating_system', 'N/A')
+        has_5g = product.get('5g_support')
+
         filename = f"{product['product_id']}_manual.pdf"
         filepath = self.output_dir / filename
+        stamp = _content_stamp(product)
+        if _is_current(filepath, stamp):
+            return filepath
 
-        doc = SimpleDocTemplate(str(filepath), pagesize=letter,
+        buffer = BytesIO()
+        doc = SimpleDocTemplate(buffer, pagesize=letter,
                               rightMargin=72, leftMargin=72,
-                              topMargin=72, bottomMargin=18)
-
-        story = []
+                              topMargin=72, bottomMargin=18,
+                              keywords=stamp)
 
-        # Title
-        title = Paragraph(f"{product['model']}<br/>Quick Start Guide", self.styles['CustomTitle'])
-        story.append(title)
-        story.append(Spacer(1, 0.3*inch))
+        section_title = self.styles['SectionTitle']
+        body_style = self.styles['BodyText']
 
-        # Welcome
         welcome_text = f"""
-        Welcome to your new {product['model']}! This guide will help you get started with your device
-        and explore its amazing features. With its powerful {product.get('processor', 'processor')},
+        Welcome to your new {model}! This guide will help you get started with your device
+        and explore its amazing features. With its powerful {processor or 'processor'},
         stunning display, and advanced camera system, you're holding cutting-edge technology in your hands.
         """
-        story.append(Paragraph(welcome_text, self.styles['BodyText']))
-        story.append(Spacer(1, 0.2*inch))
-
-        # Specifications
-        story.append(Paragraph("Device Specifications", self.styles['SectionTitle']))
-
-        spec_data = [
-            ['Feature', 'Specification'],
-            ['Processor', product.get('processor', 'N/A')],
-            ['RAM', f"{product.get('ram_gb', 'N/A')} GB"],
-            ['Storage', f"{product.get('storage_gb', 'N/A')} GB"],
-            ['Display', f"{product.get('screen_size_inches', 'N/A')}\" {product.get('screen_resolution', 'N/A')}"],
-            ['Camera', product.get('camera_mp', 'N/A')],
-            ['Battery', f"{product.get('battery_mah', 'N/A')} mAh"],
-            ['5G Support', 'Yes' if product.get('5g_support') else 'No'],
-            ['OS', product.get('operating_system', 'N/A')]
-        ]
 
+        spec_values = (
+            processor or 'N/A',
+            f"{ram} GB",
+            f"{storage} GB",
+            f"{screen_size or 'N/A'}\" {resolution}",
+            camera or 'N/A',
+            f"{battery_mah or 'N/A'} mAh",
+            'Yes' if has_5g else 'No',
+            operating_system
+        )
+        spec_data = [PHONE_SPEC_HEADER, *zip(PHONE_SPEC_LABELS, spec_values)]
         spec_table = Table(spec_data, colWidths=[2*inch, 4*inch])
-        spec_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#2c5aa0')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black)
-        ]))
-        story.append(spec_table)
-        story.append(Spacer(1, 0.3*inch))
-
-        # Getting Started
-        story.append(Paragraph("Getting Started", self.styles['SectionTitle']))
-        getting_started = """
-        <b>1. Insert SIM Card:</b> Use the SIM ejector tool to open the SIM tray. Insert your nano-SIM card.<br/><br/>
-        <b>2. Power On:</b> Hold the power button for 3 seconds until the screen lights up.<br/><br/>
-        <b>3. Setup Wizard:</b> Follow on-screen prompts to select language, connect to Wi-Fi, and sign in.<br/><br/>
-        <b>4. Security Setup:</b> Configure face unlock, fingerprint, or PIN for device security.<br/><br/>
-        <b>5. App Installation:</b> Download essential apps from the app store.
-        """
-        story.append(Paragraph(getting_started, self.styles['BodyText']))
-        story.append(Spacer(1, 0.3*inch))
+        spec_table.setStyle(PHONE_SPEC_TABLE_STYLE)
 
-        # Key Features
-        story.append(Paragraph("Key Features", self.styles['SectionTitle']))
         features_text = f"""
-        <b>Professional Camera System:</b> Capture stunning photos with {product.get('camera_mp', 'advanced')} camera
+        <b>Professional Camera System:</b> Capture stunning photos with {camera or 'advanced'} camera
         featuring night mode, portrait mode, and 4K video recording.<br/><br/>
-        <b>Lightning-Fast Performance:</b> {product.get('processor', 'Powerful processor')} ensures smooth gaming
+        <b>Lightning-Fast Performance:</b> {processor or 'Powerful processor'} ensures smooth gaming
         and multitasking.<br/><br/>
-        <b>All-Day Battery:</b> {product.get('battery_mah', 'Large')} mAh battery with fast charging support.<br/><br/>
-        <b>Immersive Display:</b> {product.get('screen_size_inches', 'Large')} inch display with HDR10+ support
+        <b>All-Day Battery:</b> {battery_mah or 'Large'} mAh battery with fast charging support.<br/><br/>
+        <b>Immersive Display:</b> {screen_size or 'Large'} inch display with HDR10+ support
         for vivid colors.<br/><br/>
-        <b>5G Connectivity:</b> {'Experience blazing-fast 5G speeds for streaming and downloads.' if product.get('5g_support') else '4G LTE connectivity for reliable mobile data.'}
+        <b>5G Connectivity:</b> {'Experience blazing-fast 5G speeds for streaming and downloads.' if has_5g else '4G LTE connectivity for reliable mobile data.'}
         """
-        story.append(Paragraph(features_text, self.styles['BodyText']))
+
+        # Assemble the story a section at a time
+        story = [
+            # Title
+            Paragraph(f"{model}<br/>Quick Start Guide", self.styles['CustomTitle']),
+            SECTION_GAP,
+            # Welcome
+            Paragraph(welcome_text, body_style),
+            MEDIUM_GAP,
+            # Specifications
+            _shared_paragraph("Device Specifications", section_title),
+            spec_table,
+            SECTION_GAP
+        ]
+        # Getting Started
+        story.extend(copy.copy(flowable) for flowable in self._phone_getting_started_template)
+        # Key Features
+        story.extend((
+            _shared_paragraph("Key Features", section_title),
+            Paragraph(features_text, body_style)
+        ))
 
         # Build PDF
         doc.build(story)
+        filepath.write_bytes(buffer.getbuffer())
         return filepath
 
-    def generate_all_manuals(self, products):
-        """Generate manuals for all products"""
+    def generate_manual(self, product):
+        """Generate the manual matching the product's category (None if there is no template)"""
+        builder = self._manual_builders.get(product['category'])
+        return builder(product) if builder else None
+
+    def generate_all_manuals(self, products, max_workers=None):
+        """Generate manuals for all products (rendered in parallel across processes)"""
         print("\nGenerating product manuals...")
-        generated_files = []
-
-        for product in products:
-            try:
-                if product['category'] == 'Laptop':
-                    filepath = self.generate_laptop_manual(product)
-                    generated_files.append(filepath)
-                elif product['category'] == 'Smartphone':
-                    filepath = self.generate_phone_manual(product)
-                    generated_files.append(filepath)
-                # Tablets can use phone manual template
-                elif product['category'] == 'Tablet':
-                    filepath = self.generate_phone_manual(product)
-                    generated_files.append(filepath)
-
-            except Exception as e:
-                print(f"Error generating manual for {product.get('model', 'unknown')}: {e}")
-                continue
+        if len(products) < MIN_PARALLEL_MANUALS:
+            filepaths = [_safe_generate(self, product) for product in products]
+        else:
+            # ReportLab rendering is CPU-bound and independent per product
+            with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker,
+                                     initargs=(self.output_dir,)) as executor:
+                filepaths = list(executor.map(_render_one, products, chunksize=4))
+        generated_files = [filepath for filepath in filepaths if filepath]
 
         print(f"✓ Generated {len(generated_files)} product manuals")
         return generated_files
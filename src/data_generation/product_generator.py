@@ -3,20 +3,40 @@ Synthetic Product Data Generator
 Creates realistic product catalogs for tech products (laptops, smartphones, tablets)
 """
 
-import json
 import csv
 import random
-from datetime import datetime, timedelta
+from datetime import datetime
 from pathlib import Path
-import pandas as pd
+import numpy as np
+import orjson
+
+def _write_json(obj, output_path):
+    """Write obj as 2-space indented JSON"""
+    Path(output_path).write_bytes(orjson.dumps(obj, option=orjson.OPT_INDENT_2))
+
+def _write_csv(rows, output_path):
+    """Stream dict rows to CSV; columns are the union of keys in first-seen order"""
+    fieldnames = list(dict.fromkeys(key for row in rows for key in row))
+    with open(output_path, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=fieldnames, restval='')
+        writer.writeheader()
+        writer.writerows(rows)
+
+def _days_before(now, days):
+    """YYYY-MM-DD dates the given numbers of days before now (negative offsets are after it)"""
+    return (np.datetime64(now.date()) - days).astype(str).tolist()
 
 class ProductDataGenerator:
     """Generate synthetic product data"""
 
-    def __init__(self, output_dir="data/raw"):
+    def __init__(self, output_dir="data/raw", seed=None):
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(parents=True, exist_ok=True)
 
+        # Private random streams: one seed reproduces the whole dataset
+        self.random = random.Random(seed)
+        self.rng = np.random.default_rng(self.random.getrandbits(64))
+
         # Product categories and specifications
         self.laptop_brands = ["Dell", "HP", "Lenovo", "Apple", "ASUS", "Acer", "Microsoft"]
         self.phone_brands = ["Apple", "Samsung", "Google", "OnePlus", "Xiaomi"]
@@ -37,155 +57,225 @@ class ProductDataGenerator:
         self.screen_sizes_phone = [6.1, 6.4, 6.7, 6.8]
         self.screen_sizes_tablet = [8.3, 10.2, 10.9, 11.0, 12.9]
 
-    def generate_laptop(self, product_id):
-        """Generate a laptop product"""
-        brand = random.choice(self.laptop_brands)
-        series = random.choice(["Pro", "Plus", "Elite", "Inspiron", "Pavilion", "ThinkPad", "VivoBook"])
-        model_num = random.randint(13, 17)
-
-        processor = random.choice(self.processors["laptop"])
-        ram = random.choice(self.ram_options)
-        storage = random.choice(self.storage_options)
-        screen = random.choice(self.screen_sizes_laptop)
+    def generate_laptops(self, product_ids, now=None):
+        """Generate a batch of laptop products (numeric columns are drawn as arrays)"""
+        n = len(product_ids)
+        now = now or datetime.now()
+        rng = self.rng
+        processors = self.processors["laptop"]
+        processor_idx = rng.integers(len(processors), size=n)
+        ram = rng.choice(self.ram_options, size=n)
+        storage = rng.choice(self.storage_options, size=n)
+        screen = rng.choice(self.screen_sizes_laptop, size=n)
 
         # Calculate realistic price based on specs
-        base_price = 500
-        if "i7" in processor or "Ryzen 7" in processor or "M2" in processor:
-            base_price += 300
-        if "i9" in processor or "Ryzen 9" in processor or "M2 Pro" in processor:
-            base_price += 600
-        base_price += (ram / 8) * 100
-        base_price += (storage / 256) * 80
-        base_price += (screen - 13) * 50
-
-        price = round(base_price + random.uniform(-100, 200), 2)
-
-        return {
-            "product_id": f"LAP-{product_id:04d}",
-            "category": "Laptop",
-            "brand": brand,
-            "model": f"{brand} {series} {model_num}",
-            "processor": processor,
-            "ram_gb": ram,
-            "storage_gb": storage,
-            "screen_size_inches": screen,
-            "screen_resolution": random.choice(["1920x1080", "2560x1440", "3840x2160"]),
-            "graphics": random.choice(["Integrated", "NVIDIA GTX 1650", "NVIDIA RTX 3050", "NVIDIA RTX 4060", "AMD Radeon", "Apple GPU"]),
-            "battery_hours": random.randint(8, 24),
-            "weight_kg": round(random.uniform(1.2, 2.5), 2),
-            "operating_system": random.choice(["Windows 11", "Windows 11 Pro", "macOS Sonoma", "Linux Ubuntu"]),
-            "price_usd": price,
-            "in_stock": random.choice([True, True, True, False]),
-            "rating": round(random.uniform(3.5, 5.0), 1),
-            "release_date": (datetime.now() - timedelta(days=random.randint(30, 730))).strftime("%Y-%m-%d"),
-            "warranty_years": random.choice([1, 2, 3])
-        }
+        tier_premium = np.array([
+            300 * ("i7" in p or "Ryzen 7" in p or "M2" in p) + 600 * ("i9" in p or "Ryzen 9" in p or "M2 Pro" in p)
+            for p in processors
+        ])
+        base_price = (500 + tier_premium[processor_idx] + (ram / 8) * 100
+                      + (storage / 256) * 80 + (screen - 13) * 50)
+        price_cents = np.rint((base_price + rng.uniform(-100, 200, size=n)) * 100).astype(np.int64)
+
+        columns = zip(
+            product_ids, processor_idx.tolist(), ram.tolist(), storage.tolist(), screen.tolist(),
+            rng.integers(8, 25, size=n).tolist(),                   # battery hours
+            np.round(rng.uniform(1.2, 2.5, size=n), 2).tolist(),    # weight
+            (price_cents / 100).tolist(),
+            (rng.random(n) < 0.75).tolist(),                        # in stock
+            np.round(rng.uniform(3.5, 5.0, size=n), 1).tolist(),    # rating
+            _days_before(now, rng.integers(30, 731, size=n)),  # release date
+            rng.integers(1, 4, size=n).tolist()                     # warranty years
+        )
+
+        # Categorical columns: one choices() call each instead of one draw per product
+        brands = self.random.choices(self.laptop_brands, k=n)
+        series = self.random.choices(["Pro", "Plus", "Elite", "Inspiron", "Pavilion", "ThinkPad", "VivoBook"], k=n)
+        model_nums = rng.integers(13, 18, size=n).tolist()
+        resolutions = self.random.choices(["1920x1080", "2560x1440", "3840x2160"], k=n)
+        graphics = self.random.choices(["Integrated", "NVIDIA GTX 1650", "NVIDIA RTX 3050", "NVIDIA RTX 4060", "AMD Radeon", "Apple GPU"], k=n)
+        systems = self.random.choices(["Windows 11", "Windows 11 Pro", "macOS Sonoma", "Linux Ubuntu"], k=n)
 
-    def generate_smartphone(self, product_id):
-        """Generate a smartphone product"""
-        brand = random.choice(self.phone_brands)
-        series = random.choice(["Pro", "Max", "Plus", "Ultra", "Note"])
-        model_num = random.randint(12, 15)
+        products = []
+        for i, (product_id, proc, ram_gb, storage_gb, screen_size, battery, weight, price_usd, in_stock, rating, released, warranty) in enumerate(columns):
+            brand = brands[i]
+            products.append({
+                "product_id": f"LAP-{product_id:04d}",
+                "category": "Laptop",
+                "brand": brand,
+                "model": f"{brand} {series[i]} {model_nums[i]}",
+                "processor": processors[proc],
+                "ram_gb": ram_gb,
+                "storage_gb": storage_gb,
+                "screen_size_inches": screen_size,
+                "screen_resolution": resolutions[i],
+                "graphics": graphics[i],
+                "battery_hours": battery,
+                "weight_kg": weight,
+                "operating_system": systems[i],
+                "price_usd": price_usd,
+                "in_stock": in_stock,
+                "rating": rating,
+                "release_date": released,
+                "warranty_years": warranty
+            })
+        return products
 
-        processor = random.choice(self.processors["phone"])
-        ram = random.choice([6, 8, 12, 16])
-        storage = random.choice([128, 256, 512, 1000])
-        screen = random.choice(self.screen_sizes_phone)
+    def generate_smartphones(self, product_ids, now=None):
+        """Generate a batch of smartphone products (numeric columns are drawn as arrays)"""
+        n = len(product_ids)
+        now = now or datetime.now()
+        rng = self.rng
+        processors = self.processors["phone"]
+        processor_idx = rng.integers(len(processors), size=n)
+        ram = rng.choice([6, 8, 12, 16], size=n)
+        storage = rng.choice([128, 256, 512, 1000], size=n)
+        screen = rng.choice(self.screen_sizes_phone, size=n)
 
         # Price calculation
-        base_price = 400
-        if "Pro" in processor or "A17" in processor:
-            base_price += 400
-        base_price += (ram / 6) * 100
-        base_price += (storage / 128) * 100
-
-        price = round(base_price + random.uniform(-50, 150), 2)
-
-        return {
-            "product_id": f"PHN-{product_id:04d}",
-            "category": "Smartphone",
-            "brand": brand,
-            "model": f"{brand} {series} {model_num}",
-            "processor": processor,
-            "ram_gb": ram,
-            "storage_gb": storage,
-            "screen_size_inches": screen,
-            "screen_resolution": random.choice(["2532x1170", "2778x1284", "3088x1440"]),
-            "camera_mp": random.choice(["48MP", "50MP", "108MP", "200MP"]),
-            "battery_mah": random.randint(3500, 5500),
-            "5g_support": random.choice([True, True, False]),
-            "operating_system": random.choice(["iOS 17", "Android 14", "Android 13"]),
-            "price_usd": price,
-            "in_stock": random.choice([True, True, True, False]),
-            "rating": round(random.uniform(4.0, 5.0), 1),
-            "release_date": (datetime.now() - timedelta(days=random.randint(30, 365))).strftime("%Y-%m-%d"),
-            "warranty_years": random.choice([1, 2])
-        }
+        tier_premium = np.array([400 * ("Pro" in p or "A17" in p) for p in processors])
+        base_price = 400 + tier_premium[processor_idx] + (ram / 6) * 100 + (storage / 128) * 100
+        price_cents = np.rint((base_price + rng.uniform(-50, 150, size=n)) * 100).astype(np.int64)
+
+        columns = zip(
+            product_ids, processor_idx.tolist(), ram.tolist(), storage.tolist(), screen.tolist(),
+            rng.integers(3500, 5501, size=n).tolist(),              # battery mAh
+            (rng.random(n) < 2 / 3).tolist(),                       # 5G support
+            (price_cents / 100).tolist(),
+            (rng.random(n) < 0.75).tolist(),                        # in stock
+            np.round(rng.uniform(4.0, 5.0, size=n), 1).tolist(),    # rating
+            _days_before(now, rng.integers(30, 366, size=n)),  # release date
+            rng.integers(1, 3, size=n).tolist()                     # warranty years
+        )
+
+        # Categorical columns: one choices() call each instead of one draw per product
+        brands = self.random.choices(self.phone_brands, k=n)
+        series = self.random.choices(["Pro", "Max", "Plus", "Ultra", "Note"], k=n)
+        model_nums = rng.integers(12, 16, size=n).tolist()
+        resolutions = self.random.choices(["2532x1170", "2778x1284", "3088x1440"], k=n)
+        cameras = self.random.choices(["48MP", "50MP", "108MP", "200MP"], k=n)
+        systems = self.random.choices(["iOS 17", "Android 14", "Android 13"], k=n)
 
-    def generate_tablet(self, product_id):
-        """Generate a tablet product"""
-        brand = random.choice(self.tablet_brands)
-        series = random.choice(["Pro", "Air", "Tab", "Surface"])
-
-        processor = random.choice(self.processors["tablet"])
-        ram = random.choice([4, 6, 8, 16])
-        storage = random.choice([64, 128, 256, 512])
-        screen = random.choice(self.screen_sizes_tablet)
-
-        base_price = 300
-        if "M2" in processor:
-            base_price += 400
-        base_price += (ram / 4) * 80
-        base_price += (storage / 64) * 50
-
-        price = round(base_price + random.uniform(-30, 100), 2)
-
-        return {
-            "product_id": f"TAB-{product_id:04d}",
-            "category": "Tablet",
-            "brand": brand,
-            "model": f"{brand} {series}",
-            "processor": processor,
-            "ram_gb": ram,
-            "storage_gb": storage,
-            "screen_size_inches": screen,
-            "screen_resolution": random.choice(["2048x1536", "2360x1640", "2732x2048"]),
-            "battery_hours": random.randint(8, 14),
-            "stylus_support": random.choice([True, False]),
-            "keyboard_included": random.choice([True, False, False]),
-            "operating_system": random.choice(["iPadOS 17", "Android 13", "Windows 11"]),
-            "price_usd": price,
-            "in_stock": random.choice([True, True, True, False]),
-            "rating": round(random.uniform(4.0, 5.0), 1),
-            "release_date": (datetime.now() - timedelta(days=random.randint(60, 500))).strftime("%Y-%m-%d"),
-            "warranty_years": random.choice([1, 2])
-        }
+        products = []
+        for i, (product_id, proc, ram_gb, storage_gb, screen_size, battery, has_5g, price_usd, in_stock, rating, released, warranty) in enumerate(columns):
+            brand = brands[i]
+            products.append({
+                "product_id": f"PHN-{product_id:04d}",
+                "category": "Smartphone",
+                "brand": brand,
+                "model": f"{brand} {series[i]} {model_nums[i]}",
+                "processor": processors[proc],
+                "ram_gb": ram_gb,
+                "storage_gb": storage_gb,
+                "screen_size_inches": screen_size,
+                "screen_resolution": resolutions[i],
+                "camera_mp": cameras[i],
+                "battery_mah": battery,
+                "5g_support": has_5g,
+                "operating_system": systems[i],
+                "price_usd": price_usd,
+                "in_stock": in_stock,
+                "rating": rating,
+                "release_date": released,
+                "warranty_years": warranty
+            })
+        return products
+
+    def generate_tablets(self, product_ids, now=None):
+        """Generate a batch of tablet products (numeric columns are drawn as arrays)"""
+        n = len(product_ids)
+        now = now or datetime.now()
+        rng = self.rng
+        processors = self.processors["tablet"]
+        processor_idx = rng.integers(len(processors), size=n)
+        ram = rng.choice([4, 6, 8, 16], size=n)
+        storage = rng.choice([64, 128, 256, 512], size=n)
+        screen = rng.choice(self.screen_sizes_tablet, size=n)
+
+        tier_premium = np.array([400 * ("M2" in p) for p in processors])
+        base_price = 300 + tier_premium[processor_idx] + (ram / 4) * 80 + (storage / 64) * 50
+        price_cents = np.rint((base_price + rng.uniform(-30, 100, size=n)) * 100).astype(np.int64)
+
+        columns = zip(
+            product_ids, processor_idx.tolist(), ram.tolist(), storage.tolist(), screen.tolist(),
+            rng.integers(8, 15, size=n).tolist(),                   # battery hours
+            (rng.random(n) < 0.5).tolist(),                         # stylus support
+            (rng.random(n) < 1 / 3).tolist(),                       # keyboard included
+            (price_cents / 100).tolist(),
+            (rng.random(n) < 0.75).tolist(),                        # in stock
+            np.round(rng.uniform(4.0, 5.0, size=n), 1).tolist(),    # rating
+            _days_before(now, rng.integers(60, 501, size=n)),  # release date
+            rng.integers(1, 3, size=n).tolist()                     # warranty years
+        )
+
+        # Categorical columns: one choices() call each instead of one draw per product
+        brands = self.random.choices(self.tablet_brands, k=n)
+        series = self.random.choices(["Pro", "Air", "Tab", "Surface"], k=n)
+        resolutions = self.random.choices(["2048x1536", "2360x1640", "2732x2048"], k=n)
+        systems = self.random.choices(["iPadOS 17", "Android 13", "Windows 11"], k=n)
 
-    def generate_catalog(self, num_products=100):
-        """Generate complete product catalog"""
         products = []
+        for i, (product_id, proc, ram_gb, storage_gb, screen_size, battery, stylus, keyboard, price_usd, in_stock, rating, released, warranty) in enumerate(columns):
+            brand = brands[i]
+            products.append({
+                "product_id": f"TAB-{product_id:04d}",
+                "category": "Tablet",
+                "brand": brand,
+                "model": f"{brand} {series[i]}",
+                "processor": processors[proc],
+                "ram_gb": ram_gb,
+                "storage_gb": storage_gb,
+                "screen_size_inches": screen_size,
+                "screen_resolution": resolutions[i],
+                "battery_hours": battery,
+                "stylus_support": stylus,
+                "keyboard_included": keyboard,
+                "operating_system": systems[i],
+                "price_usd": price_usd,
+                "in_stock": in_stock,
+                "rating": rating,
+                "release_date": released,
+                "warranty_years": warranty
+            })
+        return products
+
+    def generate_laptop(self, product_id):
+        """Generate a laptop product"""
+        return self.generate_laptops([product_id])[0]
 
-        # Generate mix of products
-        for i in range(1, num_products + 1):
-            category = random.choice(["laptop", "smartphone", "tablet"])
+    def generate_smartphone(self, product_id):
+        """Generate a smartphone product"""
+        return self.generate_smartphones([product_id])[0]
 
-            if category == "laptop":
-                product = self.generate_laptop(i)
-            elif category == "smartphone":
-                product = self.generate_smartphone(i)
-            else:
-                product = self.generate_tablet(i)
+    def generate_tablet(self, product_id):
+        """Generate a tablet product"""
+        return self.generate_tablets([product_id])[0]
 
-            products.append(product)
+    def generate_catalog(self, num_products=100):
+        """Generate complete product catalog"""
+        products = [None] * num_products
+        now = datetime.now()  # One clock read shared by every release date
+
+        # Generate mix of products: draw every category up front, then build
+        # each category in one batch and slot the rows back into id order
+        categories = self.rng.choice(["laptop", "smartphone", "tablet"], size=num_products)
+        builders = {
+            "laptop": self.generate_laptops,
+            "smartphone": self.generate_smartphones,
+            "tablet": self.generate_tablets
+        }
+        for category, builder in builders.items():
+            positions = np.flatnonzero(categories == category)
+            for i, product in zip(positions, builder((positions + 1).tolist(), now)):
+                products[i] = product
 
         return products
 
     def save_as_csv(self, products, filename="product_catalog.csv"):
         """Save products as CSV"""
-        df = pd.DataFrame(products)
         output_path = self.output_dir / "csvs" / filename
         output_path.parent.mkdir(parents=True, exist_ok=True)
-        df.to_csv(output_path, index=False)
+        _write_csv(products, output_path)
         print(f"Saved {len(products)} products to {output_path}")
         return output_path
 
@@ -193,8 +283,7 @@ class ProductDataGenerator:
         """Save products as JSON"""
         output_path = self.output_dir / "text" / filename
         output_path.parent.mkdir(parents=True, exist_ok=True)
-        with open(output_path, 'w') as f:
-            json.dump(products, f, indent=2)
+        _write_json(products, output_path)
         print(f"Saved {len(products)} products to {output_path}")
         return output_path
 
@@ -202,27 +291,35 @@ class ProductDataGenerator:
         """Generate pricing and discount table"""
         pricing_data = []
 
-        for product in products:
-            original_price = product['price_usd']
-            discount_pct = random.choice([0, 5, 10, 15, 20, 25])
-            discounted_price = original_price * (1 - discount_pct / 100)
+        # Draw each random column once for the whole table
+        k = len(products)
+        discounts = self.random.choices([0, 5, 10, 15, 20, 25], k=k)
+        promotions = self.random.choices(["None", "Holiday Sale", "Black Friday", "Clearance", "New Year"], k=k)
+        minimum_quantities = self.random.choices([1, 1, 1, 2, 5], k=k)
+        bulk_discounts = self.random.choices([True, False], k=k)
+        valid_until = _days_before(datetime.now(), -self.rng.integers(7, 91, size=k))
+
+        for i, product in enumerate(products):
+            # Integer cents: the discount is exact arithmetic rounded half up to the cent
+            original_cents = round(product['price_usd'] * 100)
+            discount_pct = discounts[i]
+            sale_cents = (original_cents * (100 - discount_pct) + 50) // 100
 
             pricing_data.append({
                 "product_id": product['product_id'],
                 "product_name": product['model'],
                 "category": product['category'],
-                "original_price_usd": round(original_price, 2),
+                "original_price_usd": original_cents / 100,
                 "discount_percent": discount_pct,
-                "sale_price_usd": round(discounted_price, 2),
-                "promotion": random.choice(["None", "Holiday Sale", "Black Friday", "Clearance", "New Year"]),
-                "valid_until": (datetime.now() + timedelta(days=random.randint(7, 90))).strftime("%Y-%m-%d"),
-                "minimum_quantity": random.choice([1, 1, 1, 2, 5]),
-                "bulk_discount_available": random.choice([True, False])
+                "sale_price_usd": sale_cents / 100,
+                "promotion": promotions[i],
+                "valid_until": valid_until[i],
+                "minimum_quantity": minimum_quantities[i],
+                "bulk_discount_available": bulk_discounts[i]
             })
 
-        df = pd.DataFrame(pricing_data)
         output_path = self.output_dir / "csvs" / "pricing.csv"
-        df.to_csv(output_path, index=False)
+        _write_csv(pricing_data, output_path)
         print(f"Saved pricing data to {output_path}")
         return output_path
 
@@ -276,8 +373,7 @@ class ProductDataGenerator:
         ]
 
         output_path = self.output_dir / "text" / "faqs.json"
-        with open(output_path, 'w') as f:
-            json.dump({"faqs": faqs}, f, indent=2)
+        _write_json({"faqs": faqs}, output_path)
         print(f"Saved {len(faqs)} FAQs to {output_path}")
         return output_path
 
@@ -4,61 +4,96 @@ Processes PDFs, CSVs, and text files with multiple embedding strategies
 """
 
 import json
-import pandas as pd
+import orjson
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain, islice
 from pathlib import Path
-from typing import List, Dict, Any
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain.document_loaders import PyPDFLoader, CSVLoader, TextLoader
-from langchain.docstore.document import Document
-import pypdf2
+from typing import List, Dict, Any, Iterator
 import re
 
+# A sentence (text between [.!?] terminators) that mentions a feature keyword;
+# the lookbehind keeps matches anchored at sentence starts so the scan stays linear
+_FACT_RE = re.compile(
+    r'(?:^|(?<=[.!?]))([^.!?]*?(?:features|includes|provides|offers|supports)[^.!?]*)',
+    re.IGNORECASE
+)
+
+# Below this many files the directory is processed in-process: starting a
+# pool costs more than it saves
+MIN_PARALLEL_FILES = 3
+
+# Set in each worker process by _init_worker
+_worker_processor = None
+
+def _init_worker(chunk_size, chunk_overlap):
+    """Create the processor used by this worker process"""
+    global _worker_processor
+    _worker_processor = MultiRepresentationProcessor(chunk_size, chunk_overlap)
+
+def _process_one(filepath):
+    """Process one file in a worker process"""
+    return _worker_processor.process_file(filepath)
+
 class MultiRepresentationProcessor:
     """Process documents with multiple representations"""
 
     def __init__(self, chunk_size=512, chunk_overlap=50):
         self.chunk_size = chunk_size
         self.chunk_overlap = chunk_overlap
-        self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=chunk_size,
-            chunk_overlap=chunk_overlap,
-            separators=["\n\n", "\n", ". ", " ", ""]
-        )
-
-    def process_pdf(self, filepath: Path) -> List[Dict[str, Any]]:
+        self._text_splitter = None  # Created on first PDF
+
+    @property
+    def text_splitter(self):
+        """Page chunker (langchain is imported only once a PDF is processed)"""
+        if self._text_splitter is None:
+            from langchain.text_splitter import RecursiveCharacterTextSplitter
+            self._text_splitter = RecursiveCharacterTextSplitter(
+                chunk_size=self.chunk_size,
+                chunk_overlap=self.chunk_overlap,
+                separators=["\n\n", "\n", ". ", " ", ""]
+            )
+        return self._text_splitter
+
+    def process_pdf(self, filepath: Path) -> Iterator[Dict[str, Any]]:
         """
         Process PDF with multiple representations:
         1. Full document
         2. Page-level chunks
         3. Extracted tables
         4. Summary (if long)
-        """
-        representations = []
 
+        Representations are yielded one at a time rather than collected.
+        """
         try:
             # Load PDF
+            from langchain.document_loaders import PyPDFLoader
             loader = PyPDFLoader(str(filepath))
             pages = loader.load()
 
-            full_text = "\n\n".join([p.page_content for p in pages])
+            # The joined text is only needed for the summary and the facts,
+            # so it is dropped before the pages are chunked
+            full_text = "\n\n".join(p.page_content for p in pages)
+            summary = full_text[:2000]  # First 2000 chars as summary
+            facts = self._extract_facts(full_text)
+            del full_text
 
             # Representation 1: Full document embedding
-            representations.append({
+            yield {
                 "doc_id": filepath.stem,
                 "type": "full_document",
-                "content": full_text[:2000],  # First 2000 chars as summary
+                "content": summary,
                 "metadata": {
                     "source": str(filepath),
                     "doc_type": "pdf",
                     "total_pages": len(pages)
                 }
-            })
+            }
 
             # Representation 2: Page-level chunks
             for idx, page in enumerate(pages):
                 chunks = self.text_splitter.split_text(page.page_content)
                 for chunk_idx, chunk in enumerate(chunks):
-                    representations.append({
+                    yield {
                         "doc_id": f"{filepath.stem}_page{idx+1}_chunk{chunk_idx}",
                         "type": "page_chunk",
                         "content": chunk,
@@ -69,12 +104,11 @@ class MultiRepresentationProcessor:
                             "chunk_id": chunk_idx,
                             "parent_doc": filepath.stem
                         }
-                    })
+                    }
 
             # Representation 3: Extract key facts/propositions
-            facts = self._extract_facts(full_text)
             for fact_idx, fact in enumerate(facts):
-                representations.append({
+                yield {
                     "doc_id": f"{filepath.stem}_fact{fact_idx}",
                     "type": "fact",
                     "content": fact,
@@ -83,13 +117,11 @@ class MultiRepresentationProcessor:
                         "doc_type": "pdf",
                         "parent_doc": filepath.stem
                     }
-                })
+                }
 
         except Exception as e:
             print(f"Error processing PDF {filepath}: {e}")
 
-        return representations
-
     def process_csv(self, filepath: Path) -> List[Dict[str, Any]]:
         """
         Process CSV with table-aware representations:
@@ -100,6 +132,7 @@ class MultiRepresentationProcessor:
         representations = []
 
         try:
+            import pandas as pd  # Deferred: only CSV ingestion needs it
             df = pd.read_csv(filepath)
 
             # Representation 1: Table summary
@@ -121,9 +154,14 @@ class MultiRepresentationProcessor:
             })
 
             # Representation 2: Row-level embeddings (for product specs, pricing)
-            for idx, row in df.iterrows():
-                row_text = " | ".join([f"{col}: {val}" for col, val in row.items()])
-                representations.append({
+            # "col: val | col: val ..." built column-wise instead of per row;
+            # fillna keeps missing values rendered as "nan" on pandas versions
+            # where astype(str) preserves NaN
+            parts = [df[col].astype(str).fillna("nan").radd(f"{col}: ") for col in df.columns]
+            row_texts = parts[0].str.cat(parts[1:], sep=" | ")
+
+            representations.extend([
+                {
                     "doc_id": f"{filepath.stem}_row{idx}",
                     "type": "table_row",
                     "content": row_text,
@@ -132,9 +170,11 @@ class MultiRepresentationProcessor:
                         "doc_type": "csv",
                         "row_index": idx,
                         "parent_table": filepath.stem,
-                        "row_data": row.to_dict()
+                        "row_data": row_data
                     }
-                })
+                }
+                for idx, (row_text, row_data) in enumerate(zip(row_texts, df.to_dict('records')))
+            ])
 
             # Representation 3: Column-specific insights (for numeric columns)
             numeric_cols = df.select_dtypes(include=['number']).columns
@@ -210,46 +250,35 @@ class MultiRepresentationProcessor:
     def _extract_facts(self, text: str, max_facts: int = 10) -> List[str]:
         """Extract key facts/propositions from text"""
         # Simple sentence extraction (in production, use LLM for better extraction)
-        sentences = re.split(r'[.!?]+', text)
-        facts = []
-
-        for sent in sentences:
-            sent = sent.strip()
-            # Filter for informative sentences
-            if len(sent) > 30 and len(sent) < 200:
-                if any(keyword in sent.lower() for keyword in ['features', 'includes', 'provides', 'offers', 'supports']):
-                    facts.append(sent)
-                    if len(facts) >= max_facts:
-                        break
-
-        return facts
-
-    def process_directory(self, data_dir: Path) -> List[Dict[str, Any]]:
-        """Process all documents in directory"""
-        all_representations = []
-
-        # Process PDFs
-        pdf_dir = data_dir / "pdfs"
-        if pdf_dir.exists():
-            for pdf_file in pdf_dir.glob("*.pdf"):
-                reps = self.process_pdf(pdf_file)
-                all_representations.extend(reps)
-
-        # Process CSVs
-        csv_dir = data_dir / "csvs"
-        if csv_dir.exists():
-            for csv_file in csv_dir.glob("*.csv"):
-                reps = self.process_csv(csv_file)
-                all_representations.extend(reps)
-
-        # Process JSON
-        text_dir = data_dir / "text"
-        if text_dir.exists():
-            for json_file in text_dir.glob("*.json"):
-                reps = self.process_json(json_file)
-                all_representations.extend(reps)
-
-        return all_representations
+        sentences = (m.group(1).strip() for m in _FACT_RE.finditer(text))
+        # Filter for informative sentences
+        return list(islice((sent for sent in sentences if 30 < len(sent) < 200), max_facts))
+
+    def process_file(self, filepath: Path) -> List[Dict[str, Any]]:
+        """Process a single PDF, CSV or JSON file according to its suffix"""
+        handlers = {
+            ".pdf": self.process_pdf,
+            ".csv": self.process_csv,
+            ".json": self.process_json,
+        }
+        handler = handlers.get(filepath.suffix.lower())
+        return list(handler(filepath)) if handler else []
+
+    def process_directory(self, data_dir: Path, max_workers: int = None) -> List[Dict[str, Any]]:
+        """Process all documents in directory (files are processed in parallel across processes)"""
+        # PDFs, then CSVs, then JSON - results keep this order
+        files = []
+        for subdir, pattern in (("pdfs", "*.pdf"), ("csvs", "*.csv"), ("text", "*.json")):
+            if (data_dir / subdir).exists():
+                files.extend((data_dir / subdir).glob(pattern))
+        if not files:
+            return []
+
+        if len(files) < MIN_PARALLEL_FILES:
+            return list(chain.from_iterable(self.process_file(filepath) for filepath in files))
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker,
+                                 initargs=(self.chunk_size, self.chunk_overlap)) as executor:
+            return list(chain.from_iterable(executor.map(_process_one, files)))
 
 
 def main():
@@ -265,10 +294,12 @@ def main():
     output_dir = Path("data/processed")
     output_dir.mkdir(parents=True, exist_ok=True)
 
-    with open(output_dir / "representations.json", 'w') as f:
-        json.dump(representations, f, indent=2)
+    # NDJSON: one representation per line, so readers can stream it
+    output_path = output_dir / "representations.jsonl"
+    with open(output_path, 'wb') as f:
+        f.writelines(orjson.dumps(rep, option=orjson.OPT_SERIALIZE_NUMPY) + b"\n" for rep in representations)
 
-    print(f"Saved to: {output_dir / 'representations.json'}")
+    print(f"Saved to: {output_path}")
 
 if __name__ == "__main__":
     main()
@@ -2,24 +2,43 @@
 Main RAG System orchestrating all components
 """
 
-import json
+import copy
+import orjson
 from pathlib import Path
 from typing import List, Dict, Optional
-from retrievers.hybrid_retriever import HybridRetriever
+import numpy as np
+
+# Nearest cached questions checked for one asked with the same top_k
+CACHE_PROBE = 8
 
 class AdvancedRAGSystem:
     """Complete RAG system with all advanced features"""
 
-    def __init__(self, data_path: str = "data/processed/representations.json"):
+    def __init__(self, data_path: str = "data/processed/representations.jsonl",
+                 cache_size: int = 256, cache_threshold: float = 0.95):
+        # Deferred: the retriever pulls in torch and sentence-transformers
+        import faiss
+        from retrievers.hybrid_retriever import HybridRetriever
+
         self.data_path = Path(data_path)
         self.documents = self._load_documents()
         self.retriever = HybridRetriever(self.documents)
 
+        # Semantic answer cache: questions whose embedding has cosine similarity
+        # >= cache_threshold with an earlier one reuse its answer. The threshold
+        # is high because templated questions about different products ("battery
+        # life of laptop X" / "of laptop Y") can score above 0.85. Entries
+        # are evicted oldest first; list positions match index ids.
+        self.cache_size = cache_size
+        self.cache_threshold = cache_threshold
+        self._qcache_index = faiss.IndexFlatIP(self.retriever.doc_embeddings.shape[1])
+        self._qcache_entries = []  # (top_k, answer)
+
     def _load_documents(self) -> List[Dict]:
-        """Load processed documents"""
+        """Load processed documents (NDJSON, one representation per line)"""
         if self.data_path.exists():
-            with open(self.data_path, 'r') as f:
-                return json.load(f)
+            with open(self.data_path, 'rb') as f:
+                return [orjson.loads(line) for line in f if line.strip()]
         return []
 
     def query(self, question: str, top_k: int = 5) -> Dict:
@@ -33,8 +52,14 @@ class AdvancedRAGSystem:
         Returns:
             Dictionary with answer, sources, and citations
         """
+        # Step 0: Reuse the answer to a near-duplicate question
+        question_embedding = self.retriever.embed_query(question)
+        cached = self._cached_answer(question_embedding, top_k)
+        if cached is not None:
+            return dict(copy.deepcopy(cached), question=question)
+
         # Step 1: Retrieve relevant documents
-        retrieved_docs = self.retriever.retrieve(question, top_k=top_k)
+        retrieved_docs = self.retriever.retrieve(question, top_k=top_k, query_embedding=question_embedding)
 
         # Step 2: Format context
         context = self._format_context(retrieved_docs)
@@ -42,8 +67,34 @@ class AdvancedRAGSystem:
         # Step 3: Generate answer (placeholder - would use LLM in production)
         answer = self._generate_answer(question, context, retrieved_docs)
 
+        # Cache a private copy so callers can modify the returned answer
+        self._cache_answer(question_embedding, top_k, copy.deepcopy(answer))
         return answer
 
+    def _cached_answer(self, question_embedding: np.ndarray, top_k: int) -> Optional[Dict]:
+        """Answer of the most similar cached question that is close enough and used the same top_k"""
+        if self._qcache_index.ntotal == 0:
+            return None
+        similarities, ids = self._qcache_index.search(question_embedding[None], min(CACHE_PROBE, self._qcache_index.ntotal))
+        for similarity, entry_id in zip(similarities[0], ids[0]):
+            if similarity < self.cache_threshold:
+                break
+            cached_top_k, answer = self._qcache_entries[entry_id]
+            if cached_top_k == top_k:
+                return answer
+        return None
+
+    def _cache_answer(self, question_embedding: np.ndarray, top_k: int, answer: Dict):
+        """Add an answer to the semantic cache, evicting the oldest entry when full"""
+        if self.cache_size <= 0:
+            return
+        if len(self._qcache_entries) >= self.cache_size:
+            # IndexFlat renumbers after removal, so ids stay aligned with the list
+            self._qcache_index.remove_ids(np.array([0], dtype=np.int64))
+            self._qcache_entries.pop(0)
+        self._qcache_index.add(question_embedding[None])
+        self._qcache_entries.append((top_k, answer))
+
     def _format_context(self, docs: List[Dict]) -> str:
         """Format retrieved documents into context"""
         context_parts = []
@@ -0,0 +1,99 @@
+"""
+Sparse-matrix BM25 (Okapi) shared by the retrievers
+"""
+
+from functools import lru_cache
+from typing import List, Sequence, Tuple
+import re
+import numpy as np
+from scipy import sparse
+
+# Word-character runs; punctuation never sticks to a term
+_TOKEN_RE = re.compile(r"\w+")
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased word tokens of a document or query"""
+    return _TOKEN_RE.findall(text.lower())
+
+@lru_cache(maxsize=512)
+def tokenize_query(query: str) -> Tuple[str, ...]:
+    """tokenize() memoized for repeated queries"""
+    return tuple(tokenize(query))
+
+class SparseBM25:
+    """
+    Precomputed BM25 (Okapi) weight of every term in every document
+
+    Same scoring as rank_bm25.BM25Okapi, including its epsilon floor for
+    negative IDF, but stored as a sparse matrix so a query is scored with
+    one sparse matrix-vector product instead of a Python loop per token.
+    """
+
+    def __init__(self, tokenized_docs: List[List[str]], k1: float = 1.5, b: float = 0.75,
+                 epsilon: float = 0.25):
+        vocabulary = {}
+        rows = []
+        cols = []
+        for doc_idx, tokens in enumerate(tokenized_docs):
+            for token in tokens:
+                cols.append(vocabulary.setdefault(token, len(vocabulary)))
+                rows.append(doc_idx)
+
+        term_freqs = sparse.csr_matrix(
+            (np.ones(len(cols), dtype=np.float32), (rows, cols)),
+            shape=(len(tokenized_docs), len(vocabulary))
+        )
+        term_freqs.sum_duplicates()
+
+        num_docs = len(tokenized_docs)
+        doc_lengths = np.asarray(term_freqs.sum(axis=1)).ravel()
+        avg_doc_length = doc_lengths.mean() if num_docs else 0.0
+
+        doc_freqs = np.bincount(term_freqs.indices, minlength=len(vocabulary))
+        idf = np.log(num_docs - doc_freqs + 0.5) - np.log(doc_freqs + 0.5)
+        if len(idf):
+            idf[idf < 0] = epsilon * idf.mean()
+
+        tf = term_freqs.data
+        row_lengths = np.repeat(doc_lengths, np.diff(term_freqs.indptr))
+        weights = idf[term_freqs.indices] * tf * (k1 + 1) / (
+            tf + k1 * (1 - b + b * row_lengths / avg_doc_length)
+        )
+
+        self.weights = sparse.csr_matrix(
+            (weights, term_freqs.indices, term_freqs.indptr), shape=term_freqs.shape
+        ).tocsc()
+        self.vocabulary = vocabulary
+        self.idf = idf
+        self.doc_lengths = doc_lengths
+
+    def __len__(self) -> int:
+        return self.weights.shape[0]
+
+    def get_scores(self, query_tokens: Sequence[str]) -> np.ndarray:
+        """BM25 score of every document for the tokenized query"""
+        # Repeated query tokens count once per occurrence, as in BM25Okapi
+        cols = [self.vocabulary[token] for token in query_tokens if token in self.vocabulary]
+        if not cols:
+            return np.zeros(self.weights.shape[0])
+        # Only the query's columns take part: W[:, terms] @ query term counts
+        terms, counts = np.unique(cols, return_counts=True)
+        return self.weights[:, terms] @ counts.astype(np.float64)
+
+    def get_matching_scores(self, query_tokens: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """Sorted ids and BM25 scores of the documents sharing a term with the query
+
+        Reads only the posting lists of the query terms, so the cost follows
+        their length rather than the corpus size; every other document scores 0.
+        """
+        cols = [self.vocabulary[token] for token in query_tokens if token in self.vocabulary]
+        if not cols:
+            return np.empty(0, dtype=int), np.empty(0)
+        terms, counts = np.unique(cols, return_counts=True)
+        starts, ends = self.weights.indptr[terms], self.weights.indptr[terms + 1]
+        doc_ids = np.concatenate([self.weights.indices[start:end] for start, end in zip(starts, ends)])
+        weights = np.concatenate([
+            self.weights.data[start:end] * count for start, end, count in zip(starts, ends, counts)
+        ])
+        matching, positions = np.unique(doc_ids, return_inverse=True)
+        return matching, np.bincount(positions, weights=weights, minlength=len(matching))
@@ -2,11 +2,88 @@
 Hybrid Retrieval System combining dense vectors (semantic) and sparse (BM25)
 """
 
-from typing import List, Dict, Any
-from rank_bm25 import BM25Okapi
+from functools import lru_cache
+from pathlib import Path
+from typing import List, Dict, Any, Optional
+import hashlib
+import os
+import tempfile
+import faiss
 import numpy as np
+import torch
 from sentence_transformers import SentenceTransformer
-from sklearn.metrics.pairwise import cosine_similarity
+from retrievers.bm25 import SparseBM25, tokenize, tokenize_query
+
+MODEL_NAME = 'all-MiniLM-L6-v2'
+
+# Reciprocal rank fusion damping constant (Cormack et al.)
+RRF_K = 60
+
+# Document embeddings persisted across runs, keyed on SHA-256 of model name,
+# encoder precision and content; the least recently written entries beyond
+# EMBEDDING_CACHE_MAX_ENTRIES are dropped
+EMBEDDING_CACHE_PATH = Path(".cache/embeddings.npz")
+EMBEDDING_CACHE_MAX_ENTRIES = 50_000
+
+# Normalized embedding matrix (.npy) and HNSW index (.faiss) of a whole corpus,
+# named after a digest of its content keys and memory-mapped when reloaded;
+# only the INDEX_CACHE_MAX_CORPORA most recently used corpora are kept
+INDEX_CACHE_DIR = Path(".cache/index")
+INDEX_CACHE_MAX_CORPORA = 4
+
+def _content_key(text: str, precision: str) -> str:
+    """Embedding cache key of a document text encoded at the given precision ('fp16' or 'fp32')"""
+    return hashlib.sha256(f"{MODEL_NAME}\x00{precision}\x00{text}".encode()).hexdigest()
+
+def _atomic_write(path: Path, write):
+    """Call write(tmp_path) on a uniquely named file next to path, then atomically replace path with it"""
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f"{path.stem}.", suffix=f".tmp{path.suffix}")
+    os.close(fd)
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        Path(tmp_path).unlink(missing_ok=True)
+        raise
+
+def _load_embedding_cache(path: Path = EMBEDDING_CACHE_PATH) -> Dict[str, np.ndarray]:
+    """Read the key -> embedding mapping, oldest entry first (empty if there is no usable cache)"""
+    try:
+        with np.load(path) as cache:
+            return dict(zip(cache['keys'].tolist(), cache['embeddings']))
+    except (OSError, KeyError, ValueError):
+        return {}
+
+def _save_embedding_cache(cache: Dict[str, np.ndarray], path: Path = EMBEDDING_CACHE_PATH,
+                          max_entries: int = EMBEDDING_CACHE_MAX_ENTRIES):
+    """Write the newest max_entries of the mapping as parallel key/embedding arrays (atomically replaced)"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    items = list(cache.items())[-max_entries:]
+    _atomic_write(path, lambda tmp_path: np.savez(
+        tmp_path, keys=np.array([key for key, _ in items]), embeddings=np.stack([value for _, value in items])
+    ))
+
+def _evict_index_cache(max_corpora: int = INDEX_CACHE_MAX_CORPORA):
+    """Delete completed index pairs beyond the max_corpora most recently used (temp files are never touched)"""
+    completed = []
+    for path in INDEX_CACHE_DIR.glob("*.npy"):
+        if len(path.suffixes) == 1:
+            try:
+                completed.append((path.stat().st_mtime, path))
+            except OSError:  # Evicted by another process meanwhile
+                pass
+    completed.sort(reverse=True)
+    for _, embeddings_path in completed[max_corpora:]:
+        embeddings_path.unlink(missing_ok=True)
+        embeddings_path.with_suffix(".faiss").unlink(missing_ok=True)
+
+@lru_cache(maxsize=4)
+def _get_st(name: str, device: str) -> SentenceTransformer:
+    """Load a SentenceTransformer once per (model, device) and share it (FP16 on GPU)"""
+    model = SentenceTransformer(name, device=device)
+    if device == 'cuda':
+        model.half()
+    return model
 
 class HybridRetriever:
     """Combines semantic search with keyword search"""
@@ -16,49 +93,164 @@ class HybridRetriever:
         self.dense_weight = dense_weight
         self.sparse_weight = sparse_weight
 
-        # Initialize embedding model
-        self.embedding_model = SentenceTransformer('all-MiniLM-L6-v2')
+        # Columnar copies of the document fields used to build results
+        self.ids = np.array([doc.get('doc_id') for doc in documents], dtype=object)
+        self.types = np.array([doc.get('type') for doc in documents], dtype=object)
+        self.contents = np.array([doc['content'] for doc in documents], dtype=object)
+        self.metadatas = np.empty(len(documents), dtype=object)
+        self.metadatas[:] = [doc.get('metadata', {}) for doc in documents]
 
-        # Prepare dense embeddings
-        self.doc_embeddings = self._embed_documents()
+        # Initialize embedding model (shared between retrievers)
+        device = 'cuda' if torch.cuda.is_available() else 'cpu'
+        self.embedding_model = _get_st(MODEL_NAME, device)
+        self.precision = 'fp16' if device == 'cuda' else 'fp32'
+
+        # Prepare dense embeddings and an HNSW graph over them
+        # (inner product on unit vectors is cosine similarity), reusing the
+        # persisted pair when the corpus is unchanged
+        keys = [_content_key(text, self.precision) for text in self.contents.tolist()]
+        corpus_digest = hashlib.sha256("\n".join(keys).encode()).hexdigest()[:16]
+        if not (keys and self._load_index(corpus_digest)):
+            self.doc_embeddings = self._embed_documents(keys)
+            self.index = faiss.IndexHNSWFlat(self.doc_embeddings.shape[1], 32, faiss.METRIC_INNER_PRODUCT)
+            self.index.hnsw.efConstruction = 80
+            self.index.add(self.doc_embeddings)
+            if keys:
+                self._save_index(corpus_digest)
+        self.index.hnsw.efSearch = 64  # Not stored by write_index
+
+        # 1 / (RRF_K + rank) for ranks 1..N, looked up at query time
+        self._rank_weights = 1.0 / (RRF_K + np.arange(1, len(self.contents) + 1))
 
         # Prepare BM25
-        tokenized_docs = [doc['content'].lower().split() for doc in documents]
-        self.bm25 = BM25Okapi(tokenized_docs)
+        self.tokenized_docs = [tokenize(content) for content in self.contents]
+        self.bm25 = SparseBM25(self.tokenized_docs)
+
+    def _load_index(self, corpus_digest: str) -> bool:
+        """Memory-map the persisted embeddings and HNSW index of this corpus, if present"""
+        try:
+            # Mark the pair as recently used for eviction
+            os.utime(INDEX_CACHE_DIR / f"{corpus_digest}.npy")
+            embeddings = np.load(INDEX_CACHE_DIR / f"{corpus_digest}.npy", mmap_mode='r')
+            index = faiss.read_index(str(INDEX_CACHE_DIR / f"{corpus_digest}.faiss"),
+                                     faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY)
+        except (OSError, ValueError, RuntimeError):
+            return False
+        if embeddings.shape[0] != len(self.contents) or index.ntotal != len(self.contents):
+            return False
+        self.doc_embeddings = embeddings
+        self.index = index
+        return True
+
+    def _save_index(self, corpus_digest: str):
+        """Persist the embeddings and HNSW index (atomically replaced), then evict least recently used corpora"""
+        INDEX_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        _atomic_write(INDEX_CACHE_DIR / f"{corpus_digest}.faiss",
+                      lambda tmp_path: faiss.write_index(self.index, tmp_path))
+        # The .npy is written last: its presence marks a complete pair
+        _atomic_write(INDEX_CACHE_DIR / f"{corpus_digest}.npy",
+                      lambda tmp_path: np.save(tmp_path, self.doc_embeddings))
+        _evict_index_cache()
+
+    def _embed_documents(self, keys: List[str]):
+        """Create unit-length embeddings for all documents
+
+        Only content missing from the on-disk cache is encoded. Stored as
+        float32 whatever precision the encoder ran in, since NumPy has no BLAS
+        path for float16 matmuls on CPU.
+
+        Args:
+            keys: _content_key() of each document
+        """
+        texts = self.contents.tolist()
+        if not texts:
+            return np.zeros((0, self.embedding_model.get_sentence_embedding_dimension()), dtype=np.float32)
+
+        cache = _load_embedding_cache()
+        missing = [i for i, key in enumerate(keys) if key not in cache]
+        if missing:
+            encoded = self.embedding_model.encode([texts[i] for i in missing], batch_size=64, convert_to_numpy=True,
+                                                  normalize_embeddings=True, show_progress_bar=True)
+            cache.update(zip((keys[i] for i in missing), encoded.astype(np.float32)))
+            # Move this corpus to the newest end so pruning drops other corpora first
+            for key in keys:
+                cache[key] = cache.pop(key)
+            _save_embedding_cache(cache, max_entries=max(EMBEDDING_CACHE_MAX_ENTRIES, len(set(keys))))
+        embeddings = np.stack([cache[key] for key in keys])
+
+        # Renormalize in float32: FP16 encoder output is only approximately unit length
+        embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+        embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True) + 1e-12
+        return embeddings
 
-    def _embed_documents(self):
-        """Create embeddings for all documents"""
-        texts = [doc['content'] for doc in self.documents]
-        return self.embedding_model.encode(texts, show_progress_bar=True)
+    def embed_query(self, query: str) -> np.ndarray:
+        """Unit-length float32 embedding of a query"""
+        query_embedding = self.embedding_model.encode([query], convert_to_numpy=True)[0].astype(np.float32)
+        query_embedding /= np.linalg.norm(query_embedding) + 1e-12
+        return query_embedding
 
-    def retrieve(self, query: str, top_k: int = 10) -> List[Dict]:
-        """Hybrid retrieval with RRF fusion"""
+    def retrieve(self, query: str, top_k: int = 10, query_embedding: Optional[np.ndarray] = None) -> List[Dict]:
+        """
+        Hybrid retrieval: weighted reciprocal rank fusion of the dense and BM25 top candidates
 
-        # Dense retrieval
-        query_embedding = self.embedding_model.encode([query])[0]
-        dense_scores = cosine_similarity([query_embedding], self.doc_embeddings)[0]
+        Each document scores dense_weight / (RRF_K + dense rank) plus
+        sparse_weight / (RRF_K + BM25 rank), scaled so that ranking first in
+        both lists gives 1.0.
 
-        # Sparse retrieval
-        tokenized_query = query.lower().split()
-        sparse_scores = self.bm25.get_scores(tokenized_query)
+        Args:
+            query: Query text
+            top_k: Number of documents to return
+            query_embedding: embed_query(query), if the caller already has it
+        """
+        if not len(self.contents) or top_k <= 0:
+            return []
+        n_candidates = min(top_k * 2, len(self.contents))
 
-        # Normalize scores
-        dense_scores = (dense_scores - dense_scores.min()) / (dense_scores.max() - dense_scores.min() + 1e-10)
-        sparse_scores = (sparse_scores - sparse_scores.min()) / (sparse_scores.max() - sparse_scores.min() + 1e-10)
+        # Dense candidates from the HNSW graph, best first (unfilled slots come back as -1)
+        if query_embedding is None:
+            query_embedding = self.embed_query(query)
+        _, dense_ids = self.index.search(query_embedding[None], n_candidates)
+        dense_ranked = dense_ids[0][dense_ids[0] >= 0]
 
-        # Combine scores
-        combined_scores = (self.dense_weight * dense_scores +
-                          self.sparse_weight * sparse_scores)
+        # Sparse candidates, best first; documents sharing no term with the query are not ranked
+        all_sparse_scores = self.bm25.get_scores(tokenize_query(query))
+        sparse_ranked = np.argpartition(-all_sparse_scores, n_candidates - 1)[:n_candidates]
+        sparse_ranked = sparse_ranked[np.argsort(-all_sparse_scores[sparse_ranked])]
+        sparse_ranked = sparse_ranked[all_sparse_scores[sparse_ranked] > 0]
 
-        # Get top-k
-        top_indices = np.argsort(combined_scores)[-top_k:][::-1]
+        # Fuse ranks: sum each document's contributions from both lists
+        ids = np.concatenate([dense_ranked, sparse_ranked])
+        contributions = np.concatenate([
+            self.dense_weight * self._rank_weights[:len(dense_ranked)],
+            self.sparse_weight * self._rank_weights[:len(sparse_ranked)],
+        ])
+        if not len(ids):
+            return []
+        candidates, positions = np.unique(ids, return_inverse=True)
+        fused = np.bincount(positions, weights=contributions, minlength=len(candidates))
+        fused *= (RRF_K + 1) / (self.dense_weight + self.sparse_weight)
 
-        results = []
-        for idx in top_indices:
-            doc = self.documents[idx].copy()
-            doc['score'] = float(combined_scores[idx])
-            doc['dense_score'] = float(dense_scores[idx])
-            doc['sparse_score'] = float(sparse_scores[idx])
-            results.append(doc)
+        # Get top-k: partial selection, then sort only the selected k
+        k = min(top_k, len(fused))
+        top_positions = np.argpartition(-fused, k - 1)[:k]
+        top_positions = top_positions[np.argsort(-fused[top_positions], kind='stable')]
+        top_ids = candidates[top_positions]
+        combined_scores = fused[top_positions]
+        dense_scores = self.doc_embeddings[top_ids] @ query_embedding
+        sparse_scores = all_sparse_scores[top_ids]
 
-        return results
+        return [
+            {
+                'doc_id': doc_id,
+                'type': doc_type,
+                'content': content,
+                'metadata': metadata,
+                'score': float(score),
+                'dense_score': float(dense),
+                'sparse_score': float(sparse),
+            }
+            for doc_id, doc_type, content, metadata, score, dense, sparse in zip(
+                self.ids[top_ids], self.types[top_ids], self.contents[top_ids], self.metadatas[top_ids],
+                combined_scores, dense_scores, sparse_scores
+            )
+        ]
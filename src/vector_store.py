@@ -4,35 +4,111 @@ ChromaDB Vector Store Integration
 
 import chromadb
 from chromadb.utils import embedding_functions
-from typing import List, Dict, Any
+from functools import lru_cache
+from typing import List, Dict, Any, Optional, Tuple
+import hashlib
 import json
+import numpy as np
+from config import settings
+from retrievers.bm25 import SparseBM25, tokenize, tokenize_query
+
+
+def quantize_int8(embeddings: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Symmetric per-row int8 quantization
+
+    Returns (codes, scales) such that embeddings ~= codes * scales.
+    """
+    scales = np.abs(embeddings).max(axis=1, keepdims=True) / 127.0
+    scales[scales == 0] = 1.0
+    codes = np.clip(np.round(embeddings / scales), -127, 127).astype(np.int8)
+    return codes, scales.astype(np.float32)
+
+
+def _min_max(scores: np.ndarray) -> np.ndarray:
+    """Rescale scores to [0, 1] (all zeros when they are constant)"""
+    low = scores.min()
+    return (scores - low) / max(scores.max() - low, 1e-9)
+
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k highest scores in descending order, without a full sort"""
+    k = min(k, len(scores))
+    if k == 0:
+        return np.array([], dtype=int)
+    top = np.argpartition(-scores, k - 1)[:k]
+    return top[np.argsort(-scores[top])]
+
+
+@lru_cache(maxsize=None)
+def _default_embedding_function() -> embedding_functions.DefaultEmbeddingFunction:
+    """ChromaDB's default embedder, shared so its model is loaded once per process"""
+    return embedding_functions.DefaultEmbeddingFunction()
+
+
+# Collection index settings: cosine space plus HNSW graph degree and
+# build/search beam widths. The graph serves HybridVectorStore's dense
+# candidate query, so search_ef must stay at or above its candidate_pool.
+HNSW_METADATA = {
+    "hnsw:space": "cosine",
+    "hnsw:M": 32,
+    "hnsw:construction_ef": 100,
+    "hnsw:search_ef": 64,
+}
 
 
 class VectorStore:
     """ChromaDB-based vector store for semantic search"""
 
-    def __init__(self, collection_name: str = "rag_products", persist_directory: str = "./chroma_db"):
-        """Initialize ChromaDB client and collection"""
-        self.client = chromadb.PersistentClient(path=persist_directory)
+    def __init__(self, collection_name: str = "rag_products", persist_directory: Optional[str] = "./chroma_db"):
+        """Initialize ChromaDB client and collection (in-memory when persist_directory is None)"""
+        if persist_directory is None:
+            self.client = chromadb.EphemeralClient()
+        else:
+            self.client = chromadb.PersistentClient(path=persist_directory)
 
         # Use ChromaDB's built-in sentence transformer embeddings
         # This uses a lightweight model that doesn't require PyTorch installation
-        self.embedding_function = embedding_functions.DefaultEmbeddingFunction()
+        self.embedding_function = _default_embedding_function()
 
         # Get or create collection
         self.collection = self.client.get_or_create_collection(
             name=collection_name,
             embedding_function=self.embedding_function,
-            metadata={"hnsw:space": "cosine"}  # Use cosine similarity
+            metadata=HNSW_METADATA
         )
 
-    def add_documents(self, documents: List[str], metadatas: List[Dict[str, Any]], ids: List[str]):
-        """Add documents to the vector store"""
-        self.collection.add(
-            documents=documents,
-            metadatas=metadatas,
-            ids=ids
-        )
+    def embed(self, texts: List[str], batch_size: int = 32) -> np.ndarray:
+        """Embed texts with the collection's embedding function in fixed-size batches"""
+        batches = [
+            np.asarray(self.embedding_function(texts[i:i + batch_size]), dtype=np.float32)
+            for i in range(0, len(texts), batch_size)
+        ]
+        return np.vstack(batches) if batches else np.empty((0, 0), dtype=np.float32)
+
+    def add_documents(self, documents: List[str], metadatas: List[Dict[str, Any]], ids: List[str],
+                      embeddings: Optional[np.ndarray] = None, batch_size: int = 256):
+        """Add documents to the vector store in batches, optionally with precomputed embeddings"""
+        for i in range(0, len(documents), batch_size):
+            batch = slice(i, i + batch_size)
+            self.collection.add(
+                documents=documents[batch],
+                metadatas=metadatas[batch],
+                ids=ids[batch],
+                embeddings=embeddings[batch].tolist() if embeddings is not None else None
+            )
+
+    def get_embeddings(self, ids: List[str]) -> np.ndarray:
+        """Fetch stored embeddings, ordered like ids"""
+        stored = self.collection.get(ids=ids, include=["embeddings"])
+        position = {doc_id: i for i, doc_id in enumerate(stored['ids'])}
+        embeddings = np.asarray(stored['embeddings'], dtype=np.float32)
+        return embeddings[[position[doc_id] for doc_id in ids]]
+
+    def query_ids(self, embedding: np.ndarray, top_k: int = 5) -> List[str]:
+        """Ids of the stored documents nearest to a precomputed embedding, best first (HNSW search)"""
+        results = self.collection.query(query_embeddings=[embedding.tolist()], n_results=top_k, include=[])
+        return results['ids'][0]
 
     def query(self, query_text: str, top_k: int = 5) -> List[Dict[str, Any]]:
         """Query the vector store for similar documents"""
@@ -58,37 +134,69 @@ class VectorStore:
         """Get the number of documents in the collection"""
         return self.collection.count()
 
-    def clear(self):
-        """Clear all documents from the collection"""
+    def get_corpus_digest(self) -> Optional[str]:
+        """Content digest recorded by the last clear(), if any"""
+        return (self.collection.metadata or {}).get("corpus_digest")
+
+    def clear(self, corpus_digest: Optional[str] = None):
+        """Clear all documents from the collection, optionally recording the digest of its next contents"""
+        metadata = dict(HNSW_METADATA)
+        if corpus_digest is not None:
+            metadata["corpus_digest"] = corpus_digest
         self.client.delete_collection(self.collection.name)
         self.collection = self.client.get_or_create_collection(
             name=self.collection.name,
             embedding_function=self.embedding_function,
-            metadata={"hnsw:space": "cosine"}
+            metadata=metadata
         )
 
 
 class HybridVectorStore:
     """Combines ChromaDB semantic search with BM25 keyword search"""
 
-    def __init__(self, collection_name: str = "rag_products", persist_directory: str = "./chroma_db"):
-        """Initialize hybrid search with both vector and keyword search"""
+    def __init__(self, collection_name: str = "rag_products", persist_directory: Optional[str] = "./chroma_db",
+                 candidate_pool: int = 50, reranker_model: str = settings.RERANKER_MODEL):
+        """
+        Initialize hybrid search with both vector and keyword search
+
+        Args:
+            collection_name: ChromaDB collection name
+            persist_directory: ChromaDB directory (None for an in-memory collection)
+            candidate_pool: Documents taken from each retriever before fusion
+            reranker_model: Cross-encoder used when searching with rerank=True
+        """
         self.vector_store = VectorStore(collection_name, persist_directory)
-        self.bm25 = None  # Will be set when building index
+        self.candidate_pool = candidate_pool
+        self.reranker_model = reranker_model
+        self._reranker = None  # Loaded on first rerank
+        # Sparse BM25 index, set when building index
+        self.bm25 = None
         self.documents = []
+        self.tokenized_docs = None
         self.metadata = []
+        self.default_alpha = 0.7  # Semantic weight the app starts from
+        # int8-quantized document embeddings and per-row scales for dense scoring
+        self.embedding_codes = None
+        self.embedding_scales = None
+        self._vector_count = None  # Collection size as of the last build_index
 
-    def build_index(self, documents: List[str], metadatas: List[Dict[str, Any]]):
-        """Build both vector and BM25 indices"""
-        from rank_bm25 import BM25Okapi
+    def build_index(self, documents: List[str], metadatas: List[Dict[str, Any]],
+                    embeddings: Optional[np.ndarray] = None):
+        """
+        Build both vector and BM25 indices
 
-        # Store documents and metadata
+        Args:
+            documents: Document texts
+            metadatas: One metadata dict per document
+            embeddings: Precomputed document embeddings. When omitted, the corpus
+                is embedded in batches before being written to ChromaDB.
+        """
+        # Store documents and metadata (tokens are reused when the texts are unchanged)
+        if self.tokenized_docs is None or documents != self.documents:
+            self.tokenized_docs = [tokenize(doc) for doc in documents]
         self.documents = documents
         self.metadata = metadatas
 
-        # Build vector index (ChromaDB)
-        ids = [f"doc_{i}" for i in range(len(documents))]
-
         # Convert metadata to JSON-serializable format
         serializable_metadatas = []
         for meta in metadatas:
@@ -101,70 +209,125 @@ class HybridVectorStore:
                     serializable_meta[key] = str(value)
             serializable_metadatas.append(serializable_meta)
 
-        self.vector_store.add_documents(documents, serializable_metadatas, ids)
+        # Build vector index (ChromaDB), reusing a persisted collection only
+        # when it was fully built from exactly these documents and metadata
+        ids = [f"doc_{i}" for i in range(len(documents))]
+        corpus_digest = hashlib.sha256(
+            json.dumps([documents, serializable_metadatas], sort_keys=True).encode()
+        ).hexdigest()
+        if (self.vector_store.get_corpus_digest() != corpus_digest
+                or self.vector_store.get_count() != len(documents)):
+            self.vector_store.clear(corpus_digest)
+
+            if embeddings is None:
+                embeddings = self.vector_store.embed(documents)
+
+            self.vector_store.add_documents(documents, serializable_metadatas, ids, embeddings=embeddings)
+        elif embeddings is None:
+            embeddings = self.vector_store.get_embeddings(ids)
+
+        # Keep an int8 copy of the embeddings for scoring (4x smaller than float32)
+        self.embedding_codes, self.embedding_scales = quantize_int8(embeddings)
+        self._vector_count = len(documents)
 
         # Build BM25 index
-        tokenized_docs = [doc.lower().split() for doc in documents]
-        self.bm25 = BM25Okapi(tokenized_docs)
+        self.bm25 = SparseBM25(self.tokenized_docs)
 
-    def hybrid_search(self, query: str, top_k: int = 5, alpha: float = 0.7) -> List[Dict[str, Any]]:
+    def hybrid_search(self, query: str, top_k: int = 5, alpha: float = 0.7,
+                      rerank: bool = False) -> List[Dict[str, Any]]:
         """
         Hybrid search combining semantic (ChromaDB) and keyword (BM25) search
 
+        Scores are fused over the candidate pool from candidate_search rather
+        than over the whole corpus.
+
         Args:
             query: Search query
             top_k: Number of results to return
             alpha: Weight for semantic search (0-1). 1-alpha is weight for BM25.
+            rerank: Order the candidate pool with the cross-encoder instead of
+                the fused score (alpha is then unused)
         """
-        # Get semantic search results (more results for better fusion)
-        vector_results = self.vector_store.query(query, top_k=top_k * 2)
-
-        # Get BM25 keyword search results
-        tokenized_query = query.lower().split()
-        bm25_scores = self.bm25.get_scores(tokenized_query)
-
-        # Create score dictionary combining both methods
-        combined_scores = {}
-
-        # Add semantic scores (convert distances to scores, lower distance = higher score)
-        for result in vector_results:
-            doc_id = result['id']
-            idx = int(doc_id.split('_')[1])
-            # Convert distance to similarity score (1 - normalized_distance)
-            # Typical cosine distances are 0-2, so normalize
-            similarity_score = 1.0 - (result['distance'] / 2.0) if result['distance'] else 1.0
-            combined_scores[idx] = alpha * similarity_score
-
-        # Add BM25 scores (normalize by max score)
-        max_bm25 = max(bm25_scores) if max(bm25_scores) > 0 else 1.0
-        for idx, score in enumerate(bm25_scores):
-            normalized_score = score / max_bm25
-            if idx in combined_scores:
-                combined_scores[idx] += (1 - alpha) * normalized_score
-            else:
-                combined_scores[idx] = (1 - alpha) * normalized_score
-
-        # Sort by combined score and get top-k
-        top_indices = sorted(combined_scores.keys(), key=lambda i: combined_scores[i], reverse=True)[:top_k]
+        candidates, dense_scores, bm25_scores = self._candidates(query, max(self.candidate_pool, top_k))
+
+        if rerank:
+            ranked = self.rerank(query, candidates, top_k=top_k)
+        else:
+            # Min-max normalize both score vectors over the candidate pool before
+            # the convex combination, so neither retriever's scale dominates
+            combined_scores = alpha * _min_max(dense_scores) + (1 - alpha) * _min_max(bm25_scores)
+
+            ranked = [
+                (candidates[i], float(combined_scores[i]))
+                for i in _top_k(combined_scores, top_k)
+                if combined_scores[i] > 0
+            ]
 
         # Format results
         results = []
-        for idx in top_indices:
-            if combined_scores[idx] > 0:
-                # Reconstruct metadata from stored data
-                metadata = self.metadata[idx]
-                results.append({
-                    'score': combined_scores[idx],
-                    'metadata': metadata,
-                    'document': self.documents[idx]
-                })
+        for idx, score in ranked:
+            # Reconstruct metadata from stored data
+            metadata = self.metadata[idx]
+            results.append({
+                'id': idx,
+                'score': score,
+                'metadata': metadata,
+                'document': self.documents[idx]
+            })
 
         return results
 
+    def candidate_search(self, query: str, n: int = 50) -> List[int]:
+        """Ids of the union of the semantic top-n and BM25 top-n documents"""
+        candidates, _, _ = self._candidates(query, n)
+        return candidates
+
+    def _candidates(self, query: str, n: int) -> Tuple[List[int], np.ndarray, np.ndarray]:
+        """Candidate ids with their semantic (cosine) and BM25 scores"""
+        if not self.documents:
+            return [], np.empty(0), np.empty(0)
+
+        # Dense candidates come from the collection's HNSW graph, so only the
+        # candidates themselves are scored against the int8 embeddings
+        query_embedding = self.vector_store.embed([query])
+        dense_ids = [int(doc_id[len("doc_"):])
+                     for doc_id in self.vector_store.query_ids(query_embedding[0], min(n, len(self.documents)))]
+
+        # Sparse candidates come from the query terms' posting lists
+        matching, matching_scores = self.bm25.get_matching_scores(tokenize_query(query))
+
+        candidates = np.union1d(np.array(dense_ids, dtype=int), matching[_top_k(matching_scores, n)])
+
+        # BM25 score of each candidate (0 unless it shares a term with the query)
+        bm25_scores = np.zeros(len(candidates))
+        positions = np.searchsorted(matching, candidates)
+        found = positions < len(matching)
+        found[found] = matching[positions[found]] == candidates[found]
+        bm25_scores[found] = matching_scores[positions[found]]
+        return candidates.tolist(), self._dense_scores(query_embedding, candidates), bm25_scores
+
+    def rerank(self, query: str, candidates: List[int], top_k: int = 5) -> List[Tuple[int, float]]:
+        """Score candidates with the cross-encoder in one batched pass and return the top-k (id, score) pairs"""
+        if self._reranker is None:
+            from sentence_transformers import CrossEncoder
+            self._reranker = CrossEncoder(self.reranker_model)
+
+        scores = np.asarray(self._reranker.predict([(query, self.documents[idx]) for idx in candidates]))
+        return [(candidates[i], float(scores[i])) for i in _top_k(scores, top_k)]
+
+    def _dense_scores(self, query_embedding: np.ndarray, ids: np.ndarray) -> np.ndarray:
+        """Approximate cosine similarity of the query to the given documents via int8 dot products"""
+        query_codes, query_scales = quantize_int8(query_embedding)
+        # int8 dot products are exact in float32 at these embedding widths, which keeps the BLAS path
+        dots = self.embedding_codes[ids].astype(np.float32) @ query_codes[0].astype(np.float32)
+        return dots * self.embedding_scales[ids, 0] * query_scales[0, 0]
+
     def get_stats(self) -> Dict[str, Any]:
-        """Get statistics about the index"""
+        """Get statistics about the index (ChromaDB is only queried before the index is built)"""
+        if self._vector_count is None:
+            self._vector_count = self.vector_store.get_count()
         return {
-            'vector_count': self.vector_store.get_count(),
+            'vector_count': self._vector_count,
             'bm25_count': len(self.documents),
             'total_documents': len(self.metadata)
         }
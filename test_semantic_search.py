@@ -5,7 +5,9 @@ Test script to verify ChromaDB semantic search is working
 import sys
 from pathlib import Path
 import pandas as pd
+import hashlib
 import json
+import numpy as np
 
 # Add src to path
 sys.path.append(str(Path(__file__).parent / "src"))
@@ -61,10 +63,8 @@ def test_semantic_search():
         documents.append(text)
         doc_metadata.append({'type': 'faq', 'data': faq})
 
-    hybrid_store = HybridVectorStore(collection_name="test_rag", persist_directory="./test_chroma_db")
-
-    # Clear existing data for fresh test
-    hybrid_store.vector_store.clear()
+    # In-memory collection, so every run starts from a fresh index
+    hybrid_store = HybridVectorStore(collection_name="test_rag", persist_directory=None)
     hybrid_store.build_index(documents, doc_metadata)
 
     stats = hybrid_store.get_stats()
@@ -115,5 +115,51 @@ def test_semantic_search():
     print("- Hybrid search (alpha=0.5) combines both approaches")
     print("\n💡 Try adjusting the semantic weight slider in the Streamlit app!")
 
+def _hashed_embeddings(texts):
+    """Deterministic bag-of-words embeddings, so the rerank test needs no model download"""
+    embeddings = np.zeros((len(texts), 64), dtype=np.float32)
+    for row, text in enumerate(texts):
+        for word in text.lower().split():
+            embeddings[row, int(hashlib.md5(word.encode()).hexdigest(), 16) % 64] += 1
+    return embeddings / (np.linalg.norm(embeddings, axis=1, keepdims=True) + 1e-9)
+
+class StubCrossEncoder:
+    """Scores a (query, document) pair by the document's length, recording every batch"""
+
+    def __init__(self):
+        self.batches = []
+
+    def predict(self, pairs):
+        self.batches.append(pairs)
+        return [len(document) for _, document in pairs]
+
+def test_hybrid_search_rerank():
+    """rerank=True orders the two-stage candidate pool with the cross-encoder"""
+    documents = [
+        "gaming laptop with RTX graphics",
+        "budget phone with a good camera",
+        "return policy: 30 days for any product",
+        "tablet with stylus support",
+        "cheap laptop for students with long battery life and a light chassis",
+    ]
+    hybrid_store = HybridVectorStore(collection_name="test_rerank", persist_directory=None, candidate_pool=2)
+    hybrid_store.vector_store.embed = _hashed_embeddings
+    hybrid_store.build_index(documents, [{'type': 'product'}] * len(documents),
+                             embeddings=_hashed_embeddings(documents))
+    hybrid_store._reranker = StubCrossEncoder()
+
+    candidates = hybrid_store.candidate_search("laptop", n=2)
+    results = hybrid_store.hybrid_search("laptop", top_k=2, rerank=True)
+
+    # One batched cross-encoder call over exactly the candidate pool
+    assert len(hybrid_store._reranker.batches) == 1
+    assert [document for _, document in hybrid_store._reranker.batches[0]] == [documents[i] for i in candidates]
+    # Ranked by the stub's score (document length), best first
+    expected = sorted(candidates, key=lambda i: len(documents[i]), reverse=True)[:2]
+    assert [result['id'] for result in results] == expected
+    assert results[0]['score'] == len(documents[expected[0]])
+    print("✅ Rerank test passed")
+
 if __name__ == "__main__":
     test_semantic_search()
+    test_hybrid_search_rerank()